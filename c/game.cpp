@@ -14,6 +14,7 @@
 #include "game.h"
 #include "network.h"
 #include "structures.h"
+#include "getters.h"
 
 #include "sexp/sfcompat.h"
 
@@ -454,6 +455,26 @@ DLLEXPORT int getPlayerCount(Connection* c)
   return c->PlayerCount;
 }
 
+DLLEXPORT int getSnapshot(Connection* c, _MoveData* moves, int moveCount, _PieceData* pieces, int pieceCount, _PlayerData* players, int playerCount)
+{
+  LOCK( &c->mutex );
+  int complete = moveCount == c->MoveCount && pieceCount == c->PieceCount && playerCount == c->PlayerCount;
+  for(int i = 0; i < moveCount && i < c->MoveCount; i++)
+  {
+    moveGetData(c->Moves+i, moves+i);
+  }
+  for(int i = 0; i < pieceCount && i < c->PieceCount; i++)
+  {
+    pieceGetData(c->Pieces+i, pieces+i);
+  }
+  for(int i = 0; i < playerCount && i < c->PlayerCount; i++)
+  {
+    playerGetData(c->Players+i, players+i);
+  }
+  UNLOCK( &c->mutex );
+  return complete;
+}
+
 
 DLLEXPORT int getTurnNumber(Connection* c)
 {
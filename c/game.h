@@ -85,6 +85,10 @@ DLLEXPORT int getPieceCount(Connection* c);
 DLLEXPORT _Player* getPlayer(Connection* c, int num);
 DLLEXPORT int getPlayerCount(Connection* c);
 
+//copies up to the given number of moves, pieces and players into the arrays in one call
+//returns 1 if the arrays were exactly the size of the client's lists, so every entry was filled
+DLLEXPORT int getSnapshot(Connection* c, _MoveData* moves, int moveCount, _PieceData* pieces, int pieceCount, _PlayerData* players, int playerCount);
+
 
 
   DLLEXPORT int networkLoop(Connection* c);
@@ -61,3 +61,30 @@ float playerGetTime(_Player* ptr)
   return ptr->time;
 }
 
+void moveGetData(_Move* ptr, _MoveData* data)
+{
+  data->ptr = ptr;
+  data->id = ptr->id;
+  data->fromFile = ptr->fromFile;
+  data->fromRank = ptr->fromRank;
+  data->toFile = ptr->toFile;
+  data->toRank = ptr->toRank;
+  data->promoteType = ptr->promoteType;
+}
+void pieceGetData(_Piece* ptr, _PieceData* data)
+{
+  data->ptr = ptr;
+  data->id = ptr->id;
+  data->owner = ptr->owner;
+  data->file = ptr->file;
+  data->rank = ptr->rank;
+  data->hasMoved = ptr->hasMoved;
+  data->type = ptr->type;
+}
+void playerGetData(_Player* ptr, _PlayerData* data)
+{
+  data->ptr = ptr;
+  data->id = ptr->id;
+  data->playerName = ptr->playerName;
+  data->time = ptr->time;
+}
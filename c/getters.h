@@ -27,6 +27,11 @@ char* playerGetPlayerName(_Player* ptr);
 float playerGetTime(_Player* ptr);
 
 
+void moveGetData(_Move* ptr, _MoveData* data);
+void pieceGetData(_Piece* ptr, _PieceData* data);
+void playerGetData(_Player* ptr, _PlayerData* data);
+
+
 
 #ifdef __cplusplus
 }
@@ -38,4 +38,34 @@ struct _Player
   float time;
 };
 
+//Plain copies of the objects above, filled in bulk by getSnapshot
+//ptr is the object itself for commands, valid until the next turn
+struct _MoveData
+{
+  _Move* ptr;
+  int id;
+  int fromFile;
+  int fromRank;
+  int toFile;
+  int toRank;
+  int promoteType;
+};
+struct _PieceData
+{
+  _Piece* ptr;
+  int id;
+  int owner;
+  int file;
+  int rank;
+  int hasMoved;
+  int type;
+};
+struct _PlayerData
+{
+  _Player* ptr;
+  int id;
+  char* playerName;
+  float time;
+};
+
 #endif
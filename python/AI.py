@@ -8,6 +8,9 @@ from GameObject import *
 from Utils import *
 from Minimax import *
 from OrderHeuristics import HistoryTable
+from PositionStore import PositionStore
+from TimeManager import TimeManager, EASYGAP
+from Tracer import Tracer
 import time, math
 
 
@@ -15,6 +18,21 @@ import random
 
 class AI(BaseAI):
   """The class implementing gameplay logic."""
+  #file deep results are saved to between games, None to turn it off
+  storepath = "positions.db"
+  #seconds the server adds after each move (timeInc in its config), None to infer it from the clock
+  increment = None
+  #fractional ply extensions searched by run
+  extensions = Extensions()
+  #half width of the aspiration window around the last iteration's score
+  window = 50
+  #seed for the eval noise, None picks a new one every game
+  seed = None
+  #deepest iteration run by run
+  maxdepth = 30
+  #records kept by the search tracer, None to turn it off, a turn over its time is dumped to trace-<turn>.txt
+  tracesize = None
+
   @staticmethod
   def username():
     return "Aperture Science"
@@ -25,10 +43,32 @@ class AI(BaseAI):
 
   def init(self):
     self.table = HistoryTable()
-    pass
+    #state after our last move and the number of moves made by then, carried into the next turn
+    self.state = None
+    self.plies = 0
+    self.timer = TimeManager(AI.increment)
+    #same noise for a position all game so cached evals stay right, printed so the game can be repeated
+    seed = AI.seed
+    if seed == None:
+      seed = random.getrandbits(32)
+    setNoiseSeed(seed)
+    print "Noise seed: ", seed
+    self.store = None
+    if AI.storepath != None:
+      self.store = PositionStore(AI.storepath)
+    self.tracer = None
+    if AI.tracesize != None:
+      self.tracer = Tracer(AI.tracesize)
+      self.tracer.enable()
+    #don't let caches from an earlier game in this process leak into this one
+    State.table.reset()
 
   def end(self):
-    pass
+    if self.tracer != None:
+      self.tracer.disable()
+    State.table.reset()
+    if self.store != None:
+      self.store.close()
 
   def run(self):
     """Selects and moves a piece or pieces"""
@@ -41,7 +81,7 @@ class AI(BaseAI):
       state += "|"
       for file in range(1, 9):
         found = False
-        for piece in self.pieces:
+        for piece in self.pieceData:
           # determines if that piece is at the current rank and file
           if piece.getRank() == rank and piece.getFile() == file:
             found = True
@@ -59,45 +99,116 @@ class AI(BaseAI):
     print state
     
     # Looks through information about the players
-    for player in self.players:
+    for player in self.playerData:
       # if playerID is 0, you're white, if its 1, you're black
       if player.getId() == self.playerID():
         mytime = player.getTime()
 
-    turntime = mytime / math.floor(1+60.0*math.exp(-len(self.moves)/50.0)) #turn left est is 50e^(-t/50)
-    
-    print "Time total: ", mytime
-    print "Time given: ",turntime
-    print "Est moves to termination: ", math.floor(1+60.0*math.exp(-len(self.moves)/50.0))
-    
-    #create a state based off the game data from the server
-    state = State()
-    state.generateFromGameData(self.pieces,self.moves,self.playerID(),self.TurnsToStalemate())
+    #carry the last turn's state forward by the opponent's reply, or rebuild it from the server
+    state = self.advanceState()
+    if state == None:
+      state = State()
+      state.generateFromGameData(self.pieceData,self.moveData,self.playerID(),self.TurnsToStalemate())
+      print "State built from game data"
+    print "Cache entries dropped: ", State.table.newTurn(state)
 
     # est. branching factor
     turnmoves = len(state.getMoves(self.playerID()))
     print "Branching: ",turnmoves
+
+    turntime = self.timer.startTurn(mytime,len(self.moves),turnmoves)
+    print "Time total: ", mytime
+    print "Time given: ",turntime
     
-    #capture time at start of iterative search
-    starttime = time.clock()
+    #fade out cutoffs from previous turns
+    self.table.age()
+
+    #capture time at start of iterative search, wall clock like the time manager so stored times can be replayed into it
+    starttime = self.timer.elapsed()
     
     #finding solution at depth 1 since no matter what we need a solution to act on
-    #a,b are -1,2 since eval returns number between 0 and 1
-    value,action = abMinimax(state,self.playerID(),1,-1,2)
+    #a,b are -INFINITY,INFINITY so every score fits
+    nodes = State.nodes
+    value,action = abMinimax(state,self.playerID(),1,-INFINITY,INFINITY)
+    self.timer.iteration(action,State.nodes-nodes,self.timer.elapsed())
     i = 2
+    #time of iterations skipped thanks to the position store
+    skipped = 0.0
 
-    #estimating that next iteration of minimax will take turnmoves times the sum of all previous minimax
-    #(assuming a full tree with branching factor turnmoves)
-    while (0.66*turnmoves*(time.clock()-starttime))+(starttime-truestarttime) < turntime:
-      value,action = abQuiOrderMinimax(state,self.playerID(),i,math.floor(math.sqrt(i)),state.evaluate(self.playerID())-.15,2,self.table)
-      i += 1
+    #pick up where an earlier game left off if this position was searched before
+    stored = None
+    if self.store != None:
+      stored = self.store.get(state)
+    if stored != None and stored[0] >= i:
+      depth,value,action,skipped = stored
+      self.timer.iteration(action,None,skipped)
+      i = depth+1
+      print "Stored depth: ", depth
+
+    AI.extensions.reset()
+    if self.tracer != None:
+      self.tracer.clear()
+    #deeper iterations are abandoned at the hard limit, keeping the last one that finished
+    State.deadline = self.timer.deadline()
+    try:
+      #a proven mate won't change with more depth
+      while i <= AI.maxdepth and abs(value) < MATEBOUND and self.timer.keepSearching():
+        nodes = State.nodes
+        itertime = self.timer.elapsed()
+        #search a narrow window around the last score first, mates need the full window
+        #the depth 1 score has no quiescence behind it so it is no center for one
+        alpha,beta = -INFINITY,INFINITY
+        if i > 2 and abs(value) < MATEBOUND:
+          alpha,beta = value-AI.window,value+AI.window
+        #a score outside the window is only a bound, the last finished iteration is kept until the search settles
+        v,a = extMinimax(state,self.playerID(),i*PLY,alpha,beta,self.table,AI.extensions)
+        if v <= alpha or v >= beta:
+          print "Depth ", i, " left the window, searching again"
+          v,a = extMinimax(state,self.playerID(),i*PLY,-INFINITY,INFINITY,self.table,AI.extensions)
+        value,action = v,a
+        i += 1
+        #a move far ahead of the others a ply shallower is obvious and ends the turn early
+        gap = None
+        if i > 3 and abs(value) < MATEBOUND:
+          gap = rootGap(state,(i-2)*PLY,action,value,EASYGAP,self.table,AI.extensions)
+        self.timer.iteration(action,State.nodes-nodes,self.timer.elapsed()-itertime,gap)
+        self.table.age()
+    except SearchTimeout:
+      print "Depth ", i, " abandoned at the hard limit"
+    State.deadline = None
+
+    if self.store != None and i > 2:
+      self.store.put(state,i-1,value,action,self.timer.elapsed()-starttime+skipped)
       
     print action.toStr()
-    print "Estimate: ",value
+    print "Estimate: ",scoreString(value)
     print "Depth: ", (i-1)
     print "Take taken: ", (time.clock()-truestarttime)
+    print self.timer.report()
+    print AI.extensions.report()
+    print State.table.report()
+    if self.tracer != None and self.timer.elapsed() > self.timer.soft:
+      path = "trace-%d.txt" % self.turnNumber()
+      print "Trace of ", self.tracer.dump(path,"turn %d over %.2fs" % (self.turnNumber(),self.timer.soft)), " records written to ", path
     action.execute()
+    self.state = state.move(action)
+    self.plies = len(self.moveData)+1
+    self.timer.endTurn()
     return 1
 
+  def advanceState(self):
+    """Applies the opponent's reply to the state kept from our last move
+    Returns: State -for this turn, None if it has to be rebuilt from the server"""
+    if self.state == None or len(self.moveData) != self.plies+1:
+      return None
+    reply = findAction(self.moveData[0],self.state)
+    if reply == None:
+      return None
+    state = self.state.move(reply)
+    if state.turn != self.playerID() or not state.matchGameData(self.pieceData,self.TurnsToStalemate()):
+      return None
+    state.clearRepetition()
+    return state
+
   def __init__(self, conn):
       BaseAI.__init__(self, conn)
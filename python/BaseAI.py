@@ -1,6 +1,6 @@
 # -*- python -*-
 
-from library import library
+from library import library, MoveData, PieceData, PlayerData
 
 class BaseAI:
   """@brief A basic AI interface.
@@ -16,15 +16,48 @@ class BaseAI:
   moves = []
   pieces = []
   players = []
+  #this turn's objects copied out of the client at once, see library.MoveData
+  moveData = []
+  pieceData = []
+  playerData = []
+  #object pointers by id for this turn, stale wrappers find themselves here
+  moveIndex = {}
+  pieceIndex = {}
+  playerIndex = {}
+
+  def snapshot(self):
+    """Copies every move, piece and player out of the client with one getSnapshot call
+    If the client's lists changed size since they were counted the copies would be short or have empty entries,
+    so the wrappers are made one object at a time instead"""
+    from GameObject import Move
+    from GameObject import Piece
+    from GameObject import Player
+
+    moves = (MoveData*library.getMoveCount(self.connection))()
+    pieces = (PieceData*library.getPieceCount(self.connection))()
+    players = (PlayerData*library.getPlayerCount(self.connection))()
+    if library.getSnapshot(self.connection, moves, len(moves), pieces, len(pieces), players, len(players)) == 1:
+      BaseAI.moveData = moves
+      BaseAI.pieceData = pieces
+      BaseAI.playerData = players
+      return
+    print "Snapshot didn't match the client, reading objects one at a time"
+    BaseAI.moveData = [Move(library.getMove(self.connection, i)) for i in xrange(library.getMoveCount(self.connection))]
+    BaseAI.pieceData = [Piece(library.getPiece(self.connection, i)) for i in xrange(library.getPieceCount(self.connection))]
+    BaseAI.playerData = [Player(library.getPlayer(self.connection, i)) for i in xrange(library.getPlayerCount(self.connection))]
 
   def startTurn(self):
     from GameObject import Move
     from GameObject import Piece
     from GameObject import Player
 
-    BaseAI.moves = [Move(library.getMove(self.connection, i)) for i in xrange(library.getMoveCount(self.connection))]
-    BaseAI.pieces = [Piece(library.getPiece(self.connection, i)) for i in xrange(library.getPieceCount(self.connection))]
-    BaseAI.players = [Player(library.getPlayer(self.connection, i)) for i in xrange(library.getPlayerCount(self.connection))]
+    self.snapshot()
+    BaseAI.moves = [Move(m.ptr, m.id) for m in BaseAI.moveData]
+    BaseAI.pieces = [Piece(p.ptr, p.id) for p in BaseAI.pieceData]
+    BaseAI.players = [Player(p.ptr, p.id) for p in BaseAI.playerData]
+    BaseAI.moveIndex = dict([(m.id, m.ptr) for m in BaseAI.moveData])
+    BaseAI.pieceIndex = dict([(p.id, p.ptr) for p in BaseAI.pieceData])
+    BaseAI.playerIndex = dict([(p.id, p.ptr) for p in BaseAI.playerData])
 
     if not self.initialized:
       self.initialized = True
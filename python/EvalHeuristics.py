@@ -4,24 +4,92 @@
 # Contains methods to evaluate a state at a non terminal position
 ##################################
 
-import random
+import json, os, random
+
+#weights of the composite terms, tune.py fits them from self-play games and writes WEIGHTSFILE
+#they sum to 1 so composite stays centred on 0.5 for an even position
+WEIGHTS = {'materialAdvantage':0.43,'materialPercentage':0.43,'pawnPercentage':0.02,
+           'pawnStructure':0.02,'checkThreat':0.05,'coverage':0.02,'mobility':0.02,'randomify':0.01}
+WEIGHTSFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),"weights.json")
+
+def loadWeights(path=WEIGHTSFILE):
+    """Replaces the composite weights with the ones in a weights file
+    Terms missing from the file keep their current weight
+    Args:
+    path -JSON file mapping term names to weights
+    Returns: bool -if the file was loaded"""
+    if not os.path.exists(path):
+        return False
+    weights = json.load(open(path))
+    for name in WEIGHTS:
+        if name in weights:
+            WEIGHTS[name] = float(weights[name])
+    return True
+
+loadWeights()
+
+#-----------------------------------------------------------------------------
+# Score domain #
+
+#search scores are ints for the player being maximized with 0 as even, a pawn is worth roughly 100
+#composite's 0-1 rating is stretched by EVALSCALE around 0.5 to make them
+EVALSCALE = 10000
+DRAW = 0
+#score of giving mate, mates found later are worth MATE less the plies from the root
+MATE = 30000
+#scores at least this far from 0 are mates
+MATEBOUND = MATE-1000
+#more than any score, for starting windows and best values
+INFINITY = 32000
+
+def toScore(rating):
+    """Converts a 0-1 heuristic rating to a search score
+    Args:
+    rating -float with 1 as winning
+    Returns: int"""
+    return int(round((rating-0.5)*EVALSCALE))
+
+def toRating(score):
+    """Converts a search score back to the 0-1 scale for display
+    Args:
+    score -int search score
+    Returns: float -rating (0-1) with 1 as winning, mates are exactly 0 or 1"""
+    if score >= MATEBOUND:
+        return 1.0
+    if score <= -MATEBOUND:
+        return 0.0
+    return min(1.0,max(0.0,0.5+float(score)/EVALSCALE))
+
+def scoreString(score):
+    """Returns: str -a search score as a 0-1 rating, or moves to mate"""
+    if score >= MATEBOUND:
+        return "mate in %d" % ((MATE-score+1)//2)
+    if score <= -MATEBOUND:
+        return "mated in %d" % ((MATE+score)//2)
+    return "%.4f" % toRating(score)
+
+#-----------------------------------------------------------------------------
+# Heuristics #
 
 def composite(state,player):
     """Takes linear combination of several heuritstics
     Args:
     state -State Object to eval
     player -Side to eval for
-    Returns: int -rating (0-1) with 1 as winning"""
+    Returns: int -rating (0-1) with 1 as winning
+    Every term is symmetric so composite(state,1) == 1-composite(state,0), unless the noise is set to be random"""
+    w = WEIGHTS
     tot = 0
     mat = getMaterial(state)
     pawn = pawnScore(state)
-    tot += (0.45)*materialAdvantage(mat,player)
-    tot += (0.45)*materialPercentage(mat,player)
-    tot += (0.02)*pawnPercentage(pawn,player)
-    tot += (0.02)*pawnStructure(pawn,player)
-    tot += (0.05)*checkThreat(state,player)
-    tot += (0.01)*randomify()
-    #tot += (0.02)*coverage(state,player)
+    tot += w['materialAdvantage']*materialAdvantage(mat,player)
+    tot += w['materialPercentage']*materialPercentage(mat,player)
+    tot += w['pawnPercentage']*pawnPercentage(pawn,player)
+    tot += w['pawnStructure']*pawnStructure(pawn,player)
+    tot += w['checkThreat']*checkThreat(state,player)
+    tot += w['coverage']*coverage(state,player)
+    tot += w['mobility']*mobility(state,player)
+    tot += w['randomify']*randomify(state,player)
     return tot
 
 def getMaterial(state):
@@ -29,26 +97,9 @@ def getMaterial(state):
     Args:
     state -State Object to eval
     Returns: Tuple(int,int) -Material scores of each player"""
-    whitescore = 0.0
-    blackscore = 0.0
-    for p in state.white:
-        if chr(p.getType()) == 'P':
-            whitescore += 1.0
-        elif chr(p.getType()) == 'N' or chr(p.getType()) == 'B':
-            whitescore += 3.0
-        elif chr(p.getType()) == 'R':
-            whitescore += 5.0
-        elif chr(p.getType()) == 'Q':
-            whitescore += 9.0
-    for p in state.black:
-        if chr(p.getType()) == 'P':
-            blackscore += 1.0
-        elif chr(p.getType()) == 'N' or chr(p.getType()) == 'B':
-            blackscore += 3.0
-        elif chr(p.getType()) == 'R':
-            blackscore += 5.0
-        elif chr(p.getType()) == 'Q':
-            blackscore += 9.0
+    c = state.counts
+    whitescore = c[0] + 3.0*(c[1]+c[2]) + 5.0*c[3] + 9.0*c[4]
+    blackscore = c[8] + 3.0*(c[9]+c[10]) + 5.0*c[11] + 9.0*c[12]
     return(whitescore,blackscore)
 
 def materialAdvantage(material,player):
@@ -96,25 +147,49 @@ def coverage(state,player):
     state -State Object to eval
     player -Side to eval for
     Returns: int -rating (0-1) with 1 as winning"""
-    actions = state.getSimpleMoves(player)
-    places = []
-    mycount = 0.0
-    for a in actions:
-        if a.piece != None and (not a.dest in places):
-            places.append(a.dest)
-            mycount += 1
-    actions = state.getSimpleMoves(1-player)
-    places = []
-    opcount = 0.0
-    for a in actions:
-        if a.piece != None and (not a.dest in places):
-            places.append(a.dest)
-            opcount += 1
+    mycount = 64.0 - state.getAttackMap(player).count([])
+    opcount = 64 - state.getAttackMap(1-player).count([])
+    if mycount+opcount == 0:
+        return 0.5
+    return mycount/(opcount+mycount)
+
+def mobility(state,player):
+    """Detirmines percentage of the moves of pieces other than pawns vs oppenent
+    Args:
+    state -State Object to eval
+    player -Side to eval for
+    Returns: int -rating (0-1) with 1 as winning"""
+    mycount = float(state.getMobility(player))
+    opcount = state.getMobility(1-player)
+    if mycount+opcount == 0:
+        return 0.5
     return mycount/(opcount+mycount)
 
-def randomify():
-    """Returns: random int (0-1)"""
-    return random.choice([0.0,.1,.2,.3,.4,.5,.6,.7,.8,.9,1.0])
+#key mixed into position hashes for the noise, None makes every call random
+NOISEKEY = random.Random(0).getrandbits(63)
+
+def setNoiseSeed(seed):
+    """Picks the noise randomify adds, the same seed and position always get the same noise
+    Args:
+    seed -int usually one per game, or None for fresh random noise on every call"""
+    global NOISEKEY
+    if seed == None:
+        NOISEKEY = None
+    else:
+        NOISEKEY = random.Random(seed).getrandbits(63)
+
+def randomify(state,player):
+    """Noise taken from the position hash so cached evals and searches can be repeated
+    Args:
+    state -State Object to eval
+    player -Side to eval for
+    Returns: int -rating (0-1) in steps of 0.1, symmetric like the other terms"""
+    if NOISEKEY == None:
+        return random.choice([0.0,.1,.2,.3,.4,.5,.6,.7,.8,.9,1.0])
+    value = (((state.hash ^ NOISEKEY) >> 17) % 11)/10.0
+    if player == 0:
+        return value
+    return 1.0-value
 
 def pawnScore(state):
     pointwhite = 0.0
@@ -165,17 +240,19 @@ def pawnScore(state):
 
 def pawnPercentage(score,player):
     whitescore,blackscore = score
+    if whitescore+blackscore == 0:
+        return 0.5
     if player == 0:
-        return (whitescore/(0.0001+blackscore+whitescore))
+        return (whitescore/(blackscore+whitescore))
     else:
-        return (blackscore/(0.0001+blackscore+whitescore))
+        return (blackscore/(blackscore+whitescore))
 
 def pawnStructure(score,player):
     whitescore,blackscore = score
     if player == 0:
-        return (whitescore/14.0)
+        return (whitescore-blackscore+14.0)/28.0
     else:
-        return (blackscore/14.0)
+        return (blackscore-whitescore+14.0)/28.0
 
     
 #---------------------------------------------------------------------------------------------------------------
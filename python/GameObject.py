@@ -13,12 +13,15 @@ class GameObject(object):
 
 ##A chess move
 class Move(GameObject):
-  def __init__(self, ptr):
+  def __init__(self, ptr, id=None):
     from BaseAI import BaseAI
     self.ptr = ptr
     self.iteration = BaseAI.iteration
     
-    self.id = library.moveGetId(ptr)
+    #the id is passed in when it's already known from a snapshot
+    if id == None:
+      id = library.moveGetId(ptr)
+    self.id = id
 
   def validify(self):
     from BaseAI import BaseAI
@@ -26,12 +29,12 @@ class Move(GameObject):
     #somewhere else in memory now
     if self.iteration == BaseAI.iteration:
       return True
-    for i in BaseAI.moves:
-      if i.id == self.id:
-        self.ptr = i.ptr
-        self.iteration = BaseAI.iteration
-        return True
-    raise ExistentialError()
+    ptr = BaseAI.moveIndex.get(self.id)
+    if ptr == None:
+      raise ExistentialError()
+    self.ptr = ptr
+    self.iteration = BaseAI.iteration
+    return True
   ##Unique Identifier
   def getId(self):
     self.validify()
@@ -76,12 +79,15 @@ class Move(GameObject):
 
 ##A chess piece
 class Piece(GameObject):
-  def __init__(self, ptr):
+  def __init__(self, ptr, id=None):
     from BaseAI import BaseAI
     self.ptr = ptr
     self.iteration = BaseAI.iteration
     
-    self.id = library.pieceGetId(ptr)
+    #the id is passed in when it's already known from a snapshot
+    if id == None:
+      id = library.pieceGetId(ptr)
+    self.id = id
 
   def validify(self):
     from BaseAI import BaseAI
@@ -89,12 +95,12 @@ class Piece(GameObject):
     #somewhere else in memory now
     if self.iteration == BaseAI.iteration:
       return True
-    for i in BaseAI.pieces:
-      if i.id == self.id:
-        self.ptr = i.ptr
-        self.iteration = BaseAI.iteration
-        return True
-    raise ExistentialError()
+    ptr = BaseAI.pieceIndex.get(self.id)
+    if ptr == None:
+      raise ExistentialError()
+    self.ptr = ptr
+    self.iteration = BaseAI.iteration
+    return True
   ##
   def move(self, file, rank, type):
     self.validify()
@@ -144,12 +150,15 @@ class Piece(GameObject):
 
 ##
 class Player(GameObject):
-  def __init__(self, ptr):
+  def __init__(self, ptr, id=None):
     from BaseAI import BaseAI
     self.ptr = ptr
     self.iteration = BaseAI.iteration
     
-    self.id = library.playerGetId(ptr)
+    #the id is passed in when it's already known from a snapshot
+    if id == None:
+      id = library.playerGetId(ptr)
+    self.id = id
 
   def validify(self):
     from BaseAI import BaseAI
@@ -157,12 +166,12 @@ class Player(GameObject):
     #somewhere else in memory now
     if self.iteration == BaseAI.iteration:
       return True
-    for i in BaseAI.players:
-      if i.id == self.id:
-        self.ptr = i.ptr
-        self.iteration = BaseAI.iteration
-        return True
-    raise ExistentialError()
+    ptr = BaseAI.playerIndex.get(self.id)
+    if ptr == None:
+      raise ExistentialError()
+    self.ptr = ptr
+    self.iteration = BaseAI.iteration
+    return True
   ##Unique Identifier
   def getId(self):
     self.validify()
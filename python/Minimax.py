@@ -5,22 +5,25 @@
 ##################################
 
 from OrderHeuristics import *
+from Utils import State
+from EvalHeuristics import DRAW, MATE, INFINITY
 
 #-----------------------------------------------------------------------------
 # heuristic minimax#
-def minimax(state,player,depth):
+def minimax(state,player,depth,ply=0):
     """
     Uses minimax algorithm to find the best utility value and action recursively
     Args:
     state- Current board state
     player- Player to maximize
     depth- depth limit
+    ply- moves made since the root, mates are scored by it
     Returns: tuple- (int,Action) Value and action to get value
     """
     # check if goal found
     terminate = state.termTest(player)
     #if not and the depth limit has not been reached be recursive
-    if terminate == -1 and depth > 0:
+    if terminate == None and depth > 0:
         actions = state.getMoves(state.turn)
         # If a player can't move
         if len(actions) == 0:
@@ -28,26 +31,26 @@ def minimax(state,player,depth):
                 #Somebody lost
                 if player == state.turn:
                     #I lost
-                    return(0.0,None)
+                    return(-MATE+ply,None)
                 else:
                     #I didn't lose so I must win
-                    return(1.0,None)
+                    return(MATE-ply,None)
             #it was a tie
-            return(.5,None)
+            return(DRAW,None)
         
         # create a record of all values and corresponding actions from this state
         record = []
         for a in actions:
-            value,futureaction = minimax(state.move(a),player,depth-1)
+            value,futureaction = minimax(state.move(a),player,depth-1,ply+1)
             record.append((value,a))
             
         if player == state.turn:
             # Maximize on my turn
-            return max(record)
+            return max(record,key=lambda result: result[0])
         else:
             # Oppenent will Minimize me on thier turn
-            return min(record)
-    elif terminate != -1:
+            return min(record,key=lambda result: result[0])
+    elif terminate != None:
         # If a goal was found
         return (terminate,None)
     else:
@@ -57,11 +60,16 @@ def minimax(state,player,depth):
 #----------------------------------------------------------------------
 # Alpha Beta Pruning #
 
-def abMinimax(state,player,depth,alpha,beta):
+def abMinimax(state,player,depth,alpha,beta,ply=0):
     # check if goal found
     terminate = state.termTest(player)
     #if not and the depth limit has not been reached be recursive
-    if terminate == -1 and depth > 0:
+    if terminate == None and depth > 0:
+        #a mate found nearer the root already beats anything found here
+        alpha = max(alpha,-MATE+ply)
+        beta = min(beta,MATE-ply)
+        if alpha >= beta:
+            return (alpha,None)
         actions = state.getMoves(state.turn)
         # If a player can't move
         if len(actions) == 0:
@@ -69,36 +77,36 @@ def abMinimax(state,player,depth,alpha,beta):
                 #Somebody lost
                 if player == state.turn:
                     #I lost
-                    return(0.0,None)
+                    return(-MATE+ply,None)
                 else:
                     #I didn't lose so I must win
-                    return(1.0,None)
+                    return(MATE-ply,None)
             #it was a tie
-            return(.5,None)
+            return(DRAW,None)
         
         if player == state.turn:
             # Maximize on my turn
-            valueaction,a = abMaxVal(state,player,depth,actions,alpha,beta)
+            valueaction,a = abMaxVal(state,player,depth,actions,alpha,beta,ply)
             alpha = a
             return valueaction
         else:
             # Oppenent will Minimize me on thier turn
-            valueaction,b = abMinVal(state,player,depth,actions,alpha,beta)
+            valueaction,b = abMinVal(state,player,depth,actions,alpha,beta,ply)
             beta = b
             return valueaction
-    elif terminate != -1:
+    elif terminate != None:
         # If a goal was found
         return (terminate,None)
     else:
         # if depth limit reached evaluate the current state
         return (state.evaluate(player),None)
 
-def abMaxVal(state,player,depth,actions,alpha,beta):
+def abMaxVal(state,player,depth,actions,alpha,beta,ply):
     # Dummy max value, smaller than any possible value
-    maxval = (-1,"I AM ERROR")
+    maxval = (-INFINITY,None)
     for act in actions:
-        value,futureaction = abMinimax(state.move(act),player,depth-1,alpha,beta)
-        if (value,futureaction) > maxval:
+        value,futureaction = abMinimax(state.move(act),player,depth-1,alpha,beta,ply+1)
+        if value > maxval[0]:
             #update max
             maxval = (value,act)
         if beta <= value:
@@ -110,12 +118,12 @@ def abMaxVal(state,player,depth,actions,alpha,beta):
     return (maxval,alpha)
 
 
-def abMinVal(state,player,depth,actions,alpha,beta):
+def abMinVal(state,player,depth,actions,alpha,beta,ply):
     # Dummy min value, bigger than any possible value
-    minval = (2,"I AM ERROR")
+    minval = (INFINITY,None)
     for act in actions:
-        value,futureaction = abMinimax(state.move(act),player,depth-1,alpha,beta)
-        if (value,futureaction) < minval:
+        value,futureaction = abMinimax(state.move(act),player,depth-1,alpha,beta,ply+1)
+        if value < minval[0]:
             #update min
             minval = (value,act)
         if value <= alpha:
@@ -129,7 +137,7 @@ def abMinVal(state,player,depth,actions,alpha,beta):
 #----------------------------------------------------------------------
 # Alpha Beta Pruning with move ordering #
 
-def abOrderMinimax(state,player,depth,alpha,beta,table):
+def abOrderMinimax(state,player,depth,alpha,beta,table,ply=0):
     #st = str(state.turn)
     #for i in range(depth+1):
         #st = st + ">>"
@@ -138,7 +146,12 @@ def abOrderMinimax(state,player,depth,alpha,beta,table):
     # check if goal found
     terminate = state.termTest(player)
     #if not and the depth limit has not been reached be recursive
-    if terminate == -1 and depth > 0:
+    if terminate == None and depth > 0:
+        #a mate found nearer the root already beats anything found here
+        alpha = max(alpha,-MATE+ply)
+        beta = min(beta,MATE-ply)
+        if alpha >= beta:
+            return (alpha,None)
         actions = state.getMoves(state.turn)
         # If a player can't move
         if len(actions) == 0:
@@ -147,32 +160,28 @@ def abOrderMinimax(state,player,depth,alpha,beta,table):
                 if player == state.turn:
                     #I lost
                     #print st," Lose: 0"
-                    return(0.0,None)
+                    return(-MATE+ply,None)
                 else:
                     #I didn't lose so I must win
                     #print st," Win: 1"
-                    return(1.0,None)
+                    return(MATE-ply,None)
             #it was a tie
             #print st," Stale: .5"
-            return(.5,None)
+            return(DRAW,None)
         
         if player == state.turn:
             # Maximize on my turn
-            valueaction,a = abOrderMaxVal(state,player,depth,actions,alpha,beta,table)
-            value,act = valueaction
-            table.update(act)
+            valueaction,a = abOrderMaxVal(state,player,depth,actions,alpha,beta,table,ply)
             alpha = a
             #print st," MAX: ", value
             return valueaction
         else:
             # Oppenent will Minimize me on thier turn
-            valueaction,b = abOrderMinVal(state,player,depth,actions,alpha,beta,table)
-            value,act = valueaction
-            table.update(act)
+            valueaction,b = abOrderMinVal(state,player,depth,actions,alpha,beta,table,ply)
             beta = b
             #print st," MIN: ", value
             return valueaction
-    elif terminate != -1:
+    elif terminate != None:
         # If a goal was found
         #print st," Stale: ", terminate
         return (terminate,None)
@@ -181,17 +190,18 @@ def abOrderMinimax(state,player,depth,alpha,beta,table):
         #print st," EVAL: ", state.evaluate(player)
         return (state.evaluate(player),None)
 
-def abOrderMaxVal(state,player,depth,actions,alpha,beta,table):
+def abOrderMaxVal(state,player,depth,actions,alpha,beta,table,ply):
     # Dummy max value, smaller than any possible value
-    maxval = (-1,"I AM ERROR")
+    maxval = (-INFINITY,None)
     sort = orderByHistory(actions,table)
     for act in sort:
-        value,futureaction = abOrderMinimax(state.move(act),player,depth-1,alpha,beta,table)
-        if (value,futureaction) > maxval:
+        value,futureaction = abOrderMinimax(state.move(act),player,depth-1,alpha,beta,table,ply+1)
+        if value > maxval[0]:
             #update max
             maxval = (value,act)
         if beta <= value:
             #prune
+            table.update(act,depth)
             break
         if value > alpha:
             # did not fail high or low so update alpha
@@ -199,17 +209,18 @@ def abOrderMaxVal(state,player,depth,actions,alpha,beta,table):
     return (maxval,alpha)
 
 
-def abOrderMinVal(state,player,depth,actions,alpha,beta,table):
+def abOrderMinVal(state,player,depth,actions,alpha,beta,table,ply):
     # Dummy min value, bigger than any possible value
-    minval = (2,"I AM ERROR")
+    minval = (INFINITY,None)
     sort = orderByHistory(actions,table)
     for act in sort:
-        value,futureaction = abOrderMinimax(state.move(act),player,depth-1,alpha,beta,table)
-        if (value,futureaction) < minval:
+        value,futureaction = abOrderMinimax(state.move(act),player,depth-1,alpha,beta,table,ply+1)
+        if value < minval[0]:
             #update min
             minval = (value,act)
         if value <= alpha:
             #prune
+            table.update(act,depth)
             break
         if value < beta:
             # did not fail high or low so update beta
@@ -219,11 +230,82 @@ def abOrderMinVal(state,player,depth,actions,alpha,beta,table):
 #----------------------------------------------------------------------
 # Alpha Beta Pruning with move ordering and Quiesent Extensions#
 
-def abQuiOrderMinimax(state,player,depth,extension,alpha,beta,table):        
+def quiesce(state,player,limit,alpha,beta,table,ply=0):
+    """Searches captures past the depth limit until the position is quiet so it isn't evaluated in the middle of an exchange
+    The side to move may stand pat on the evaluation instead of capturing, captures that lose material by
+    static exchange aren't searched and a side in check searches every reply since it can't stand pat
+    Args:
+    state- Current board state
+    player- Player to maximize
+    limit- plies that may still be searched, the evaluation is returned once it runs out
+    alpha,beta- search window
+    table- HistoryTable for move ordering
+    ply- moves made since the root, mates are scored by it
+    Returns: tuple- (int,Action) Value and action to get value"""
     # check if goal found
     terminate = state.termTest(player)
-    #if not terminal and the depth limit or extension has not been reached be recursive
-    if terminate == -1 and extension > 0 and (depth > 0 or not state.quiet):
+    if terminate != None:
+        return (terminate,None)
+    actions = state.getMoves(state.turn)
+    check = state.isInCheck(state.turn)
+    # If a player can't move
+    if len(actions) == 0:
+        if check:
+            if player == state.turn:
+                #I lost
+                return (-MATE+ply,None)
+            #I didn't lose so I must win
+            return (MATE-ply,None)
+        #it was a tie
+        return (DRAW,None)
+    if limit <= 0:
+        return (state.evaluate(player),None)
+
+    maximize = player == state.turn
+    if check:
+        if maximize:
+            best = (-INFINITY,None)
+        else:
+            best = (INFINITY,None)
+        sort = orderMoves(state,actions,table)
+    else:
+        #not capturing is always an option, so the evaluation is a bound on the score
+        best = (state.evaluate(player),None)
+        if maximize:
+            if best[0] >= beta:
+                return best
+            alpha = max(alpha,best[0])
+        else:
+            if best[0] <= alpha:
+                return best
+            beta = min(beta,best[0])
+        sort = orderMoves(state,[act for act in actions if isCapture(state,act)],table,False)
+    for act in sort:
+        value,futureaction = quiesce(state.move(act),player,limit-1,alpha,beta,table,ply+1)
+        if (maximize and value > best[0]) or (not maximize and value < best[0]):
+            best = (value,act)
+        if maximize:
+            alpha = max(alpha,value)
+        else:
+            beta = min(beta,value)
+        if beta <= alpha:
+            #prune
+            break
+    return best
+
+def abQuiOrderMinimax(state,player,depth,extension,alpha,beta,table,ply=0):        
+    #past the depth limit only captures are searched, for at most extension plies
+    if depth <= 0:
+        return quiesce(state,player,extension,alpha,beta,table,ply)
+    # check if goal found
+    terminate = state.termTest(player)
+    #if not terminal be recursive
+    if terminate == None:
+        #a mate found nearer the root already beats anything found here
+        alpha = max(alpha,-MATE+ply)
+        beta = min(beta,MATE-ply)
+        if alpha >= beta:
+            return (alpha,None)
         actions = state.getMoves(state.turn)
         # If a player can't move
         if len(actions) == 0:
@@ -231,52 +313,46 @@ def abQuiOrderMinimax(state,player,depth,extension,alpha,beta,table):
                 #Somebody lost
                 if player == state.turn:
                     #I lost
-                    return(0.0,None)
+                    return(-MATE+ply,None)
                 else:
                     #I didn't lose so I must win
-                    return(1.0,None)
+                    return(MATE-ply,None)
             #it was a tie
-            return(.5,None)
+            return(DRAW,None)
 
         if player == state.turn:
             # Maximize on my turn
-            valueaction,a = abQuiOrderMaxVal(state,player,depth,extension,actions,alpha,beta,table)
-            value,act = valueaction
-            table.update(act)
+            valueaction,a = abQuiOrderMaxVal(state,player,depth,extension,actions,alpha,beta,table,ply)
+            #a move that failed low is no better than the others
+            if valueaction[0] > alpha:
+                State.table.setBest(state,valueaction[1])
             alpha = a
             return valueaction
         else:
             # Oppenent will Minimize me on thier turn
-            valueaction,b = abQuiOrderMinVal(state,player,depth,extension,actions,alpha,beta,table)
-            value,act = valueaction
-            table.update(act)
+            valueaction,b = abQuiOrderMinVal(state,player,depth,extension,actions,alpha,beta,table,ply)
+            if valueaction[0] < beta:
+                State.table.setBest(state,valueaction[1])
             beta = b
             return valueaction
-    elif terminate != -1:
+    else:
         # If a goal was found
         return (terminate,None)
-    else:
-        # if depth limit reached evaluate the current state
-        return (state.evaluate(player),None)
 
-def abQuiOrderMaxVal(state,player,depth,extension,actions,alpha,beta,table):
+def abQuiOrderMaxVal(state,player,depth,extension,actions,alpha,beta,table,ply):
     # Dummy max value, smaller than any possible value
-    maxval = (-1,"I AM ERROR")
-    sort = orderByHistory(actions,table)
-    if depth > 0:
-        newdepth = depth-1
-        newextension = extension
-    else:
-        newdepth = 0
-        newextension = extension-1
-        
+    maxval = (-INFINITY,None)
+    #the last search's best move goes first
+    hashmove = State.table.getBest(state,actions)
+    sort = bestFirst(state,actions,table,hashmove)
     for act in sort:
-        value,futureaction = abQuiOrderMinimax(state.move(act),player,newdepth,newextension,alpha,beta,table)
-        if (value,futureaction) > maxval:
+        value,futureaction = abQuiOrderMinimax(state.move(act),player,depth-1,extension,alpha,beta,table,ply+1)
+        if value > maxval[0]:
             #update max
             maxval = (value,act)
         if beta <= value:
             #prune
+            table.update(act,depth)
             break
         if value > alpha:
             # did not fail high or low so update alpha
@@ -284,24 +360,20 @@ def abQuiOrderMaxVal(state,player,depth,extension,actions,alpha,beta,table):
     return (maxval,alpha)
 
 
-def abQuiOrderMinVal(state,player,depth,extension,actions,alpha,beta,table):
+def abQuiOrderMinVal(state,player,depth,extension,actions,alpha,beta,table,ply):
     # Dummy min value, bigger than any possible value
-    minval = (2,"I AM ERROR")
-    sort = orderByHistory(actions,table)
-    if depth > 0:
-        newdepth = depth-1
-        newextension = extension
-    else:
-        newdepth = 0
-        newextension = extension-1
-    
+    minval = (INFINITY,None)
+    #the last search's best move goes first
+    hashmove = State.table.getBest(state,actions)
+    sort = bestFirst(state,actions,table,hashmove)
     for act in sort:
-        value,futureaction = abQuiOrderMinimax(state.move(act),player,newdepth,newextension,alpha,beta,table)
-        if (value,futureaction) < minval:
+        value,futureaction = abQuiOrderMinimax(state.move(act),player,depth-1,extension,alpha,beta,table,ply+1)
+        if value < minval[0]:
             #update min
             minval = (value,act)
         if value <= alpha:
             #prune
+            table.update(act,depth)
             break
         if value < beta:
             # did not fail high or low so update beta
@@ -309,3 +381,237 @@ def abQuiOrderMinVal(state,player,depth,extension,actions,alpha,beta,table):
     return (minval,beta)
 
 
+
+#----------------------------------------------------------------------
+# Principal variation and Multi PV analysis #
+
+def pvMinimax(state,player,depth,alpha,beta,table,ply=0):
+    """Alpha beta search with move ordering that also tracks the principal variation
+    Args:
+    state- Current board state
+    player- Player to maximize
+    depth- depth limit
+    alpha,beta- search window
+    table- HistoryTable for move ordering
+    ply- moves made since the root, mates are scored by it
+    Returns: tuple- (int,list) Value and list of actions expected to be played from here"""
+    # check if goal found
+    terminate = state.termTest(player)
+    if terminate != None:
+        return (terminate,[])
+    if depth <= 0:
+        return (state.evaluate(player),[])
+    #a mate found nearer the root already beats anything found here
+    alpha = max(alpha,-MATE+ply)
+    beta = min(beta,MATE-ply)
+    if alpha >= beta:
+        return (alpha,[])
+    actions = state.getMoves(state.turn)
+    # If a player can't move
+    if len(actions) == 0:
+        if state.isInCheck(state.turn):
+            if player == state.turn:
+                #I lost
+                return (-MATE+ply,[])
+            #I didn't lose so I must win
+            return (MATE-ply,[])
+        #it was a tie
+        return (DRAW,[])
+
+    maximize = player == state.turn
+    if maximize:
+        best = -INFINITY
+    else:
+        best = INFINITY
+    bestpv = []
+    for act in orderByHistory(actions,table):
+        value,pv = pvMinimax(state.move(act),player,depth-1,alpha,beta,table,ply+1)
+        if (maximize and value > best) or (not maximize and value < best):
+            best = value
+            bestpv = [act] + pv
+        if maximize:
+            alpha = max(alpha,value)
+        else:
+            beta = min(beta,value)
+        if beta <= alpha:
+            #prune
+            table.update(act,depth)
+            break
+    return (best,bestpv)
+
+def multiPV(state,depth,count,table):
+    """Finds the best few moves for the side to move with their scores and principal variations
+    Every root move shares the history table and the State caches, and once count moves
+    are known the rest are only searched with a window that proves them worse
+    Args:
+    state- Current board state
+    depth- depth limit
+    count- number of moves to report
+    table- HistoryTable for move ordering
+    Returns: list- of (int,list) value and principal variation, best first"""
+    player = state.turn
+    results = []
+    for act in orderByHistory(state.getMoves(player),table):
+        # only moves that beat the current worst of the top count matter
+        if len(results) >= count:
+            alpha = results[-1][0]
+        else:
+            alpha = -INFINITY
+        value,pv = pvMinimax(state.move(act),player,depth-1,alpha,INFINITY,table,1)
+        if len(results) < count or value > alpha:
+            results.append((value,[act] + pv))
+            results.sort(key=lambda result: result[0],reverse=True)
+            del results[count:]
+    return results
+
+#----------------------------------------------------------------------
+# Fractional ply extensions #
+
+#depth units in one ply so extensions can add part of a ply
+PLY = 4
+#plies of captures extMinimax searches past its depth limit
+QUIESCENCE = 6
+
+class Extensions:
+    """Extension amounts in PLY units with counts of how often each fired and the states searched below it"""
+    KINDS = ('check','single','recapture','pawn7')
+    def __init__(self,check=4,single=3,recapture=2,pawn7=2,limit=8):
+        """Constructor
+        Args:
+        check -units added for a move that gives check
+        single -units added when the side to move has only one legal reply
+        recapture -units added for capturing back on the square just captured on
+        pawn7 -units added for a pawn reaching its seventh rank
+        limit -most units added along any one path, keeps the search bounded"""
+        self.amounts = {'check':check,'single':single,'recapture':recapture,'pawn7':pawn7}
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        """Clears the statistics"""
+        self.fired = dict([(kind,0) for kind in Extensions.KINDS])
+        self.nodes = dict([(kind,0) for kind in Extensions.KINDS])
+
+    def kinds(self,state,child,act,single):
+        """Finds the extensions a move earns
+        Args:
+        state- board before the move
+        child- board after the move
+        act- Action taken
+        single- bool if act was the only legal move
+        Returns: list- of extension names"""
+        kinds = []
+        if single:
+            kinds.append('single')
+        if act.piece != None:
+            r,f = act.dest
+            if self.amounts['recapture'] > 0 and not state.quiet and state.getAtPos(act.dest) != None:
+                last = state.history.action
+                if last.piece != None and last.dest == act.dest:
+                    kinds.append('recapture')
+            if self.amounts['pawn7'] > 0 and chr(act.piece.getType()) == 'P' and r == 6-5*act.piece.getOwner():
+                kinds.append('pawn7')
+        if self.amounts['check'] > 0 and child.isInCheck(child.turn):
+            kinds.append('check')
+        return kinds
+
+    def report(self):
+        """Returns: str -times each extension fired and states searched below those moves
+        States below nested extensions count toward each of them"""
+        string = "Extensions (limit %d/%d ply):" % (self.limit,PLY)
+        for kind in Extensions.KINDS:
+            string += "\n  %s +%d/%d: fired %d, states %d" % (kind,self.amounts[kind],PLY,self.fired[kind],self.nodes[kind])
+        return string
+
+def extMinimax(state,player,depth,alpha,beta,table,ext,used=0,ply=0):
+    """Alpha beta search with move ordering that searches tactical moves deeper and captures past the depth limit
+    Args:
+    state- Current board state
+    player- Player to maximize
+    depth- depth limit in PLY units
+    alpha,beta- search window
+    table- HistoryTable for move ordering
+    ext- Extensions to apply and record statistics in
+    used- units already added on the path to this state
+    ply- moves made since the root, mates are scored by it
+    Returns: tuple- (int,Action) Value and action to get value"""
+    if depth <= 0:
+        return quiesce(state,player,QUIESCENCE,alpha,beta,table,ply)
+    # check if goal found
+    terminate = state.termTest(player)
+    if terminate != None:
+        return (terminate,None)
+    #a mate found nearer the root already beats anything found here
+    alpha = max(alpha,-MATE+ply)
+    beta = min(beta,MATE-ply)
+    if alpha >= beta:
+        return (alpha,None)
+    actions = state.getMoves(state.turn)
+    # If a player can't move
+    if len(actions) == 0:
+        if state.isInCheck(state.turn):
+            if player == state.turn:
+                #I lost
+                return (-MATE+ply,None)
+            #I didn't lose so I must win
+            return (MATE-ply,None)
+        #it was a tie
+        return (DRAW,None)
+
+    maximize = player == state.turn
+    if maximize:
+        best = (-INFINITY,None)
+    else:
+        best = (INFINITY,None)
+    single = len(actions) == 1
+    window = (alpha,beta)
+    #the best move from the last search of this position, usually the last iteration, goes first
+    hashmove = State.table.getBest(state,actions)
+    for act in bestFirst(state,actions,table,hashmove):
+        child = state.move(act)
+        kinds = ext.kinds(state,child,act,single)
+        # never more than a ply at once or past the limit of the path
+        extra = min(sum([ext.amounts[kind] for kind in kinds]),PLY,ext.limit-used)
+        if extra > 0:
+            nodes = State.nodes
+            value,futureaction = extMinimax(child,player,depth-PLY+extra,alpha,beta,table,ext,used+extra,ply+1)
+            for kind in kinds:
+                ext.fired[kind] += 1
+                ext.nodes[kind] += State.nodes-nodes
+        else:
+            value,futureaction = extMinimax(child,player,depth-PLY,alpha,beta,table,ext,used,ply+1)
+        if (maximize and value > best[0]) or (not maximize and value < best[0]):
+            best = (value,act)
+        if maximize:
+            alpha = max(alpha,value)
+        else:
+            beta = min(beta,value)
+        if beta <= alpha:
+            #prune
+            table.update(act,(depth+PLY-1)//PLY)
+            break
+    #a move that failed low is no better than the others
+    if (maximize and best[0] > window[0]) or (not maximize and best[0] < window[1]):
+        State.table.setBest(state,best[1])
+    return best
+
+def rootGap(state,depth,best,value,margin,table,ext):
+    """Checks how far the best root move is ahead of the others with null window searches, which fail low quickly
+    when every other move is well behind
+    Args:
+    state- Root board state, searched for the side to move
+    depth- depth limit in PLY units, usually less than the iteration found best with
+    best- Action found best
+    value- its score
+    margin- gap worth proving, the search stops at the first move that comes within it
+    table- HistoryTable for move ordering
+    ext- Extensions to apply
+    Returns: int- gap to the best other move, margin when every other move is at least that far behind"""
+    player = state.turn
+    bound = value-margin
+    actions = [act for act in state.getMoves(player) if act.toStr() != best.toStr()]
+    for act in orderMoves(state,actions,table):
+        score,futureaction = extMinimax(state.move(act),player,depth-PLY,bound,bound+1,table,ext,0,1)
+        if score > bound:
+            return value-score
+    return margin
@@ -4,69 +4,147 @@
 # Contains methods to effectively order a minimax search
 ##################################
 
-from Utils import toCoords
-import heapq
+from Utils import toCoords, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
 
 #-----------------------------------------------------------------------------
 # History table and associated methods #
 
-def hashify(action):
-    """Extracts all important data from action to be hashed in a dictionary
+def toIndex(action):
+    """Finds the slot of an action in the history table
     Args:
     action -Action object
-    Returns: hashable tuple
-    """
+    Returns: int -side*4096 + from*64 + to with squares numbered rank*8+file"""
     if action.piece != None:
-        frm = toCoords(action.piece)
-        to = action.dest
-        p = action.piece.getType()
+        r,f = toCoords(action.piece)
+        tr,tf = action.dest
+        side = action.piece.getOwner()
     else:
         (king,kpos),rook = action.dest
-        frm = toCoords(king)
-        to = kpos
-        p = ord("K")
-    return(p,(frm,to))
+        r,f = toCoords(king)
+        tr,tf = kpos
+        side = king.getOwner()
+    return side*4096 + (r*8+f)*64 + tr*8+tf
 
 class HistoryTable:
-    """Hash Table to aid in effective move ordering"""
+    """Butterfly history table to aid in effective move ordering
+    Scores are kept in one flat list indexed by [side][from][to]"""
     def __init__(self):
         """Constructor"""
-        self.tbl = dict()
-    def update(self,action):
-        """Adds or increments a key for a action
+        self.tbl = [0]*(2*64*64)
+    def update(self,action,depth):
+        """Rewards an action that caused a cutoff
         Args:
         action -Action object
-        """
-        h = hashify(action)
-        if h in self.tbl:
-            self.tbl[hashify(action)] += 1
-        else:
-            self.tbl[hashify(action)] = 1
+        depth -remaining depth where the cutoff happened"""
+        self.tbl[toIndex(action)] += depth*depth
     def get(self,action):
         """Gets stored value for action
         Args:
         action -Action object
-        Returns: int -number of times updated
-        """
-        h = hashify(action)
-        if h in self.tbl:
-            return self.tbl[hashify(action)]
-        else:
-            return 0
+        Returns: int -accumulated cutoff score"""
+        return self.tbl[toIndex(action)]
+    def age(self):
+        """Halves every score so old cutoffs fade out
+        Should be called between turns and between iterations"""
+        self.tbl = [v >> 1 for v in self.tbl]
+
+#-----------------------------------------------------------------------------
+# Static exchange evaluation #
+
+#material in search score units, the king is worth more than anything it could win
+SEEVALUES = {PAWN:100,KNIGHT:300,BISHOP:300,ROOK:500,QUEEN:900,KING:20000}
+
+def isCapture(state,action):
+    """Returns: bool -if the action takes a piece, en passant included"""
+    if action.piece == None:
+        return False
+    if state.getAtPos(action.dest) != None:
+        return True
+    #a pawn changing file without landing on a piece is taking en passant
+    return action.piece.getType() == PAWN and action.dest[1] != action.piece.getFile()-1
+
+def see(state,action):
+    """Finds what a capture wins once every piece attacking the square has joined in,
+    each side capturing with its least valuable piece and stopping when going on would lose more
+    Args:
+    state -State the action is taken from
+    action -Action capturing a piece
+    Returns: int -material won in SEEVALUES units, negative if the capture loses material"""
+    r,f = action.dest
+    target = state.getAtPos(action.dest)
+    if target == None:
+        #en passant
+        gains = [SEEVALUES[PAWN]]
+    else:
+        gains = [SEEVALUES[target.getType()]]
+    piece = action.piece
+    gone = set([(piece.getRank()-1)*8+piece.getFile()-1])
+    #value of the piece standing on the square, about to be taken
+    onsquare = SEEVALUES[piece.getType()]
+    side = 1-piece.getOwner()
+    while True:
+        attackers = state.getAttackers((r,f),side,gone)
+        if len(attackers) == 0:
+            break
+        sq,p = min(attackers,key=lambda attacker: SEEVALUES[attacker[1].type])
+        gains.append(onsquare-gains[-1])
+        gone.add(sq)
+        onsquare = SEEVALUES[p.type]
+        side = 1-side
+    #each side may stop capturing instead of going on
+    for i in range(len(gains)-1,0,-1):
+        gains[i-1] = -max(-gains[i-1],gains[i])
+    return gains[0]
 
 #-----------------------------------------------------------------------------
 # Move ordering functions #
 
 def orderByHistory(actions,table):
-    sort = []
-    for each in actions:
-        sort.append((table.get(each),each))
+    """Sorts actions by history score, best first
+    Ties keep the order they were generated in
+    Args:
+    actions -list of Action objects
+    table -HistoryTable
+    Returns: list -sorted actions"""
+    return sorted(actions,key=table.get,reverse=True)
 
-    sort.sort()
-    sort.reverse()
+def orderMoves(state,actions,table,losing=True):
+    """Sorts captures that don't lose material first by what they win,
+    then the other moves by history score and the losing captures last
+    Args:
+    state -State the actions are taken from
+    actions -list of Action objects
+    table -HistoryTable
+    losing -bool if captures that lose material are kept, quiescence search leaves them out
+    Returns: list -sorted actions"""
+    good = []
+    quiet = []
+    bad = []
+    for act in actions:
+        if isCapture(state,act):
+            gain = see(state,act)
+            if gain >= 0:
+                good.append((gain,act))
+            elif losing:
+                bad.append((gain,act))
+        else:
+            quiet.append(act)
+    good.sort(key=lambda capture: capture[0],reverse=True)
+    bad.sort(key=lambda capture: capture[0],reverse=True)
+    return [act for gain,act in good] + orderByHistory(quiet,table) + [act for gain,act in bad]
 
-    final = []
-    for val,item in sort:
-        final.append(item)
-        
-    return final
+def bestFirst(state,actions,table,best,losing=True):
+    """Yields the move that was best when the state was last searched, then the rest in orderMoves order
+    The rest are only sorted if the search asks for them, so a cutoff by the first move saves the sort
+    Args:
+    state -State the actions are taken from
+    actions -list of Action objects
+    table -HistoryTable
+    best -Action from actions or None
+    losing -bool if captures that lose material are kept
+    Returns: generator of actions"""
+    if best != None:
+        yield best
+        actions = [act for act in actions if not act is best]
+    for act in orderMoves(state,actions,table,losing):
+        yield act
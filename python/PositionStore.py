@@ -0,0 +1,99 @@
+##################################
+# PositionStore.py
+# Keeps deep search results on disk so later games can skip searching known positions
+##################################
+
+from Utils import toCoords
+import sqlite3
+
+#-----------------------------------------------------------------------------
+# Move encoding #
+
+def encodeMove(action):
+    """Packs an action into an int that stays valid across processes
+    Args:
+    action -Action object
+    Returns: int -from*64+to with squares numbered rank*8+file, castles use the king's squares"""
+    if action.piece != None:
+        r,f = toCoords(action.piece)
+        tr,tf = action.dest
+    else:
+        (king,kpos),rook = action.dest
+        r,f = toCoords(king)
+        tr,tf = kpos
+    return (r*8+f)*64 + tr*8+tf
+
+def decodeMove(state,code):
+    """Finds the legal action in a state matching an encoded move
+    Args:
+    state -State to find the action in
+    code -int from encodeMove
+    Returns: Action or None if no legal move matches"""
+    for each in state.getMoves(state.turn):
+        if encodeMove(each) == code:
+            return each
+    return None
+
+#-----------------------------------------------------------------------------
+# Position store #
+
+class PositionStore:
+    """SQLite table of search results keyed by position hash
+    Scores are stored from the point of view of the side to move"""
+    #format of the file, older files are cleared when opened
+    #version 2 has integer scores, version 1 scored 0-1
+    VERSION = 2
+    def __init__(self,path="positions.db"):
+        """Constructor, the file isn't opened until the first lookup
+        Args:
+        path -file to keep the table in"""
+        self.path = path
+        self.db = None
+
+    def connect(self):
+        """Opens the file and creates the table if needed
+        Returns: sqlite3 connection"""
+        if self.db == None:
+            self.db = sqlite3.connect(self.path)
+            if self.db.execute("PRAGMA user_version").fetchone()[0] < PositionStore.VERSION:
+                #scores from older versions can't be compared with the current ones
+                self.db.execute("DROP TABLE IF EXISTS positions")
+                self.db.execute("PRAGMA user_version = %d" % PositionStore.VERSION)
+            self.db.execute("CREATE TABLE IF NOT EXISTS positions (hash INTEGER PRIMARY KEY, depth INTEGER, score INTEGER, move INTEGER, seconds REAL)")
+        return self.db
+
+    def get(self,state):
+        """Looks up a stored search result
+        Args:
+        state -State to look up
+        Returns: tuple(int,int,Action,float) -depth, score, best move and seconds the search took,
+        or None if unknown or the move isn't legal here"""
+        row = self.connect().execute("SELECT depth,score,move,seconds FROM positions WHERE hash = ?",(state.hash,)).fetchone()
+        if row == None:
+            return None
+        depth,score,code,seconds = row
+        action = decodeMove(state,code)
+        if action == None:
+            #hash collision or stale entry
+            return None
+        return (depth,score,action,seconds)
+
+    def put(self,state,depth,score,action,seconds):
+        """Records a search result unless a deeper one is already stored
+        Args:
+        state -State that was searched
+        depth -int depth the search finished
+        score -int value for the side to move
+        action -Action found best
+        seconds -float time the search took"""
+        db = self.connect()
+        row = db.execute("SELECT depth FROM positions WHERE hash = ?",(state.hash,)).fetchone()
+        if row == None or row[0] <= depth:
+            db.execute("INSERT OR REPLACE INTO positions VALUES (?,?,?,?,?)",(state.hash,depth,score,encodeMove(action),seconds))
+            db.commit()
+
+    def close(self):
+        """Closes the file"""
+        if self.db != None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,147 @@
+##################################
+# TimeManager.py
+# Decides how long to search each turn and when to stop deepening
+##################################
+
+from PositionStore import encodeMove
+import math, time
+
+#seconds always left on the clock for network and overhead
+RESERVE = 1.0
+#the hard limit is at most this share of the clock left (plus the increment) and this many soft limits
+HARDSHARE = 0.25
+HARDSCALE = 4.0
+#iterations with the same best move before the search counts as stable, and how much that cuts the soft limit
+STABLE = 3
+STABLESCALE = 0.6
+#score gap between the two best moves that makes the move obvious, and how much that cuts the soft limit
+EASYGAP = 300
+EASYSCALE = 0.5
+
+class TimeManager:
+    """Soft and hard time limits for iterative deepening
+    The soft limit is the time a turn should take, it grows while the best move keeps changing and shrinks once it settles.
+    The hard limit is never passed, searches run with State.deadline set to it and are abandoned when it raises SearchTimeout.
+    Times are wall clock seconds since that's what the server charges"""
+    def __init__(self,increment=None):
+        """Constructor
+        Args:
+        increment -float seconds added to the clock after every move, None to infer it from the clock"""
+        self.increment = increment
+        #clock readings to infer the increment from
+        self.lastclock = None
+        self.lastspent = 0.0
+        self.observed = []
+        self.soft = 0.0
+        self.hard = 0.0
+        self.starttime = time.time()
+        self.branching = 1
+        self.reset()
+
+    def reset(self):
+        """Clears what was learned during a turn"""
+        self.times = []
+        self.nodes = []
+        self.best = None
+        self.sameBest = 0
+        self.instability = 0.0
+        self.easy = False
+
+    def getIncrement(self):
+        """Returns: float -seconds gained per move, the configured increment or else what the clock did on earlier turns
+        Inferred values are net of the time the server charges outside the search so they can be negative"""
+        if self.increment != None:
+            return self.increment
+        if len(self.observed) > 0:
+            return sum(self.observed)/len(self.observed)
+        return 0.0
+
+    def startTurn(self,clock,ply,branching):
+        """Sets the limits for a new turn and starts its timer
+        Args:
+        clock -float seconds left on this side's clock
+        ply -int moves made so far in the game
+        branching -int number of legal moves, the growth assumed until iterations are measured
+        Returns: float -the soft limit"""
+        self.starttime = time.time()
+        if self.lastclock != None:
+            self.observed.append(clock-(self.lastclock-self.lastspent))
+        self.lastclock = clock
+        self.branching = max(branching,1)
+        self.reset()
+        increment = self.getIncrement()
+        #turns left est is 60e^(-t/50)
+        movesleft = math.floor(1+60.0*math.exp(-ply/50.0))
+        available = max(clock-RESERVE,0.0)
+        self.hard = min(available,HARDSHARE*available+max(increment,0.0))
+        self.soft = min(self.hard,available/movesleft+increment)
+        self.hard = min(self.hard,HARDSCALE*max(self.soft,0.0))
+        self.soft = max(self.soft,0.0)
+        return self.soft
+
+    def elapsed(self):
+        """Returns: float -seconds since the turn started"""
+        return time.time()-self.starttime
+
+    def iteration(self,action,nodes,seconds,gap=None):
+        """Records a finished iteration
+        Args:
+        action -Action the iteration found best
+        nodes -int states it generated, None if unknown
+        seconds -float time it took
+        gap -int score between the best and second best move, None if not searched"""
+        self.times.append(seconds)
+        self.nodes.append(nodes)
+        code = encodeMove(action)
+        self.instability *= 0.5
+        if code == self.best:
+            self.sameBest += 1
+        else:
+            #changes in the first iterations are normal and say little
+            if self.best != None and len(self.times) > 2:
+                self.instability += 1.0
+            self.sameBest = 0
+            self.best = code
+        self.easy = gap != None and gap >= EASYGAP
+
+    def branchingFactor(self):
+        """Returns: float -growth in states from one iteration to the next, measured when possible"""
+        if len(self.nodes) >= 2 and self.nodes[-1] != None and self.nodes[-2]:
+            return max(1.5,min(float(self.nodes[-1])/self.nodes[-2],self.branching))
+        #full tree estimate used before the search could be measured
+        return max(1.5,0.66*self.branching)
+
+    def predict(self):
+        """Returns: float -seconds the next iteration should take"""
+        if len(self.times) == 0:
+            return 0.0
+        return self.times[-1]*self.branchingFactor()
+
+    def target(self):
+        """Returns: float -the soft limit adjusted for how settled the search is"""
+        target = self.soft*(1.0+self.instability)
+        if self.sameBest >= STABLE:
+            target *= STABLESCALE
+        if self.easy:
+            target *= EASYSCALE
+        return min(target,self.hard)
+
+    def keepSearching(self):
+        """Returns: bool -if another iteration should be started"""
+        elapsed = self.elapsed()
+        #an iteration expected to run far past the target would likely be abandoned, wasting the time
+        return elapsed+0.5*self.predict() < self.target() and elapsed < self.hard
+
+    def deadline(self):
+        """Returns: float -time.time() at the hard limit, for State.deadline"""
+        return self.starttime+self.hard
+
+    def endTurn(self):
+        """Stops the turn timer, the time is used to infer the increment next turn
+        Returns: float -seconds the turn took"""
+        self.lastspent = self.elapsed()
+        return self.lastspent
+
+    def report(self):
+        """Returns: str -the limits and search measurements of the turn"""
+        return "soft %.2fs hard %.2fs target %.2fs increment %.2fs branching %.2f" % (self.soft,self.hard,self.target(),self.getIncrement(),self.branchingFactor())
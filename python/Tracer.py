@@ -0,0 +1,128 @@
+##################################
+# Tracer.py
+# Records what a search did in a ring buffer so a bad move can be looked at after the game
+# View a dump with: python traceview.py trace.txt
+##################################
+
+import sys, time
+
+#field in the search arguments after depth (the capture limit for quiesce) where alpha is, beta follows it
+WINDOWS = {'minimax':None,'abMinimax':0,'abOrderMinimax':0,'abQuiOrderMinimax':1,'pvMinimax':0,'extMinimax':0,'quiesce':0}
+
+#record kinds
+ENTER = '>'
+EXIT = '<'
+ABORT = '!'
+
+class Tracer:
+    """Keeps the last records of a search, one when a node is entered and one when it returns
+    Enabling swaps the search functions for recording wrappers in every module that imported them and disabling puts
+    the originals back, so a tracer that isn't enabled adds nothing to the search"""
+    def __init__(self,size=200000):
+        """Constructor
+        Args:
+        size -int records kept, older ones are overwritten"""
+        self.size = size
+        #search name to (original,wrapper)
+        self.installed = {}
+        self.records = [None]*size
+        self.clear()
+
+    def clear(self):
+        """Drops every record, the buffer is reused"""
+        self.count = 0
+        self.ply = 0
+
+    def enabled(self):
+        """Returns: bool -if any search is being recorded"""
+        return len(self.installed) > 0
+
+    def enable(self,names=('extMinimax','abQuiOrderMinimax')):
+        """Starts recording searches
+        Args:
+        names -search function names from Minimax to record"""
+        import Minimax
+        for name in names:
+            if name in self.installed:
+                continue
+            original = getattr(Minimax,name)
+            wrapper = self.wrap(original,name)
+            self.installed[name] = (original,wrapper)
+            self.replace(original,wrapper,name)
+
+    def disable(self):
+        """Stops recording and puts the original searches back, records are kept"""
+        for name,(original,wrapper) in self.installed.items():
+            self.replace(wrapper,original,name)
+        self.installed = {}
+
+    def replace(self,old,new,name):
+        """Points every loaded module's name at new where it was old, searches call themselves through their module"""
+        for module in sys.modules.values():
+            if module != None and getattr(module,name,None) is old:
+                setattr(module,name,new)
+
+    def wrap(self,search,name):
+        """Makes a recording version of a search
+        Args:
+        search -function(state,player,depth,...) returning (value,action) or (value,pv)
+        name -str name of the search in WINDOWS, recorded with every node so quiescence can be told apart
+        Returns: function"""
+        tracer = self
+        window = WINDOWS[name]
+        def traced(state,player,depth,*args,**kwargs):
+            alpha,beta = None,None
+            if window != None:
+                alpha,beta = args[window],args[window+1]
+            ply = tracer.ply
+            last = None
+            if state.history != None:
+                last = state.history.action
+            tracer.record((ENTER,ply,depth,alpha,beta,state.turn == player,state.hash,name,last))
+            tracer.ply = ply+1
+            try:
+                result = search(state,player,depth,*args,**kwargs)
+            except:
+                tracer.ply = ply
+                tracer.record((ABORT,ply))
+                raise
+            tracer.ply = ply
+            value,action = result
+            if isinstance(action,list):
+                #a principal variation
+                action = action[0] if len(action) > 0 else None
+            tracer.record((EXIT,ply,value,action))
+            return result
+        return traced
+
+    def record(self,entry):
+        """Adds a record, overwriting the oldest once the buffer is full"""
+        self.records[self.count%self.size] = entry
+        self.count += 1
+
+    def dump(self,path,note=""):
+        """Writes the records oldest first as tab separated lines
+        > ply depth alpha beta maximizing hash search move-into-the-state
+        < ply value best-move
+        ! ply, the search was abandoned by an exception like SearchTimeout
+        Args:
+        path -file to write
+        note -str written in the header
+        Returns: int -number of records written"""
+        start = max(0,self.count-self.size)
+        out = open(path,"w")
+        out.write("# search trace %s, %d of %d records, %s\n" % (note,self.count-start,self.count,time.strftime("%Y-%m-%d %H:%M:%S")))
+        for i in range(start,self.count):
+            entry = self.records[i%self.size]
+            if entry[0] == ABORT:
+                out.write("%s\t%d\n" % entry)
+                continue
+            fields = [str(field) for field in entry[:-1]]
+            action = entry[-1]
+            if action == None:
+                fields.append("-")
+            else:
+                fields.append(action.toStr())
+            out.write("\t".join(fields) + "\n")
+        out.close()
+        return self.count-start
@@ -5,6 +5,8 @@
 # This code is meant to interface with the 2012 SIG Game chess framework
 ##################################
 from EvalHeuristics import *
+from collections import OrderedDict
+import random, sys, time
 
 #---------------------------------------------------------------------------------------------------------------
 
@@ -34,13 +36,141 @@ def toAction(move,state):
     dest = (move.getToRank()-1,move.getToFile()-1)
     piece = state.getAtPos(dest)
     return Action(piece,dest)
+
+def findAction(move,state):
+    """Finds the legal action a Move object made from a state, castles are found by the king's move
+    Args:
+    move- a Move or MoveData object
+    state- State the move was made from
+    Returns: Action or None if no legal action matches"""
+    frm = (move.getFromRank()-1,move.getFromFile()-1)
+    dest = (move.getToRank()-1,move.getToFile()-1)
+    for each in state.getMoves(state.turn):
+        if each.piece != None:
+            if toCoords(each.piece) == frm and each.dest == dest:
+                return each
+        else:
+            (king,kpos),rook = each.dest
+            if toCoords(king) == frm and kpos == dest:
+                return each
+    return None
     
 
 #---------------------------------------------------------------------------------------------------------------
 
-class Action:
+# Zobrist hashing #
+
+#index of each piece type in the key table
+KINDS = {ord('P'):0,ord('N'):1,ord('B'):2,ord('R'):3,ord('Q'):4,ord('K'):5}
+#kinds whose first move can give up castling rights
+UNMOVED = (3,5)
+
+#piece type codes as BetterPiece stores them and the steps each piece moves by
+PAWN,KNIGHT,BISHOP,ROOK,QUEEN,KING = [ord(c) for c in "PNBRQK"]
+KNIGHTSTEPS = ((2,1),(2,-1),(1,2),(1,-2),(-1,2),(-1,-2),(-2,1),(-2,-1))
+KINGSTEPS = ((1,1),(1,-1),(-1,1),(-1,-1),(1,0),(-1,0),(0,1),(0,-1))
+DIAGONALS = ((1,1),(1,-1),(-1,1),(-1,-1))
+LINES = ((1,0),(-1,0),(0,1),(0,-1))
+
+def _targets(sq,steps):
+    """Returns: tuple- square indices one step away from sq that are on the board"""
+    r,f = sq//8,sq%8
+    return tuple([(r+dr)*8+f+df for dr,df in steps if 0 <= r+dr < 8 and 0 <= f+df < 8])
+
+def _rays(sq,steps):
+    """Returns: tuple- for each direction the square indices from sq to the edge of the board"""
+    rays = []
+    for dr,df in steps:
+        ray = []
+        r,f = sq//8+dr,sq%8+df
+        while 0 <= r < 8 and 0 <= f < 8:
+            ray.append(r*8+f)
+            r += dr
+            f += df
+        if len(ray) > 0:
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+#squares attacked from each square indexed by square, pawns by owner then square
+PAWNTARGETS = tuple([tuple([_targets(sq,((1-2*player,1),(1-2*player,-1))) for sq in range(64)]) for player in (0,1)])
+STEPTARGETS = {KNIGHT:tuple([_targets(sq,KNIGHTSTEPS) for sq in range(64)]),
+               KING:tuple([_targets(sq,KINGSTEPS) for sq in range(64)])}
+SLIDERRAYS = {BISHOP:tuple([_rays(sq,DIAGONALS) for sq in range(64)]),
+              ROOK:tuple([_rays(sq,LINES) for sq in range(64)]),
+              QUEEN:tuple([_rays(sq,DIAGONALS+LINES) for sq in range(64)])}
+
+#fixed seed so hashes are the same in every process
+_zrand = random.Random(347)
+ZPIECE = [[_zrand.getrandbits(63) for sq in range(64)] for kind in range(16)]
+ZTURN = _zrand.getrandbits(63)
+ZPASSANT = [_zrand.getrandbits(63) for f in range(8)]
+#castling rights indexed owner*2+side with side 0 toward the a file
+ZCASTLE = [_zrand.getrandbits(63) for right in range(4)]
+
+def pieceKey(piece,sq):
+    """Finds the hash key of a piece standing on a square
+    Args:
+    piece- a Piece or BetterPiece object
+    sq- int square index rank*8+file
+    Returns: int"""
+    return ZPIECE[piece.getOwner()*8+KINDS[piece.getType()]][sq]
+
+def castleKey(board):
+    """Finds the hash key of the castling rights on a board
+    A right needs an unmoved king and an unmoved rook in the corner, so positions with the same rights hash the
+    same however the pieces got there
+    Args:
+    board- list of 64 pieces or None
+    Returns: int"""
+    h = 0
+    for owner in (0,1):
+        home = 56*owner
+        king = board[home+4]
+        if king == None or king.getOwner() != owner or king.getType() != KING or king.getHasMoved() != 0:
+            continue
+        for side in (0,1):
+            rook = board[home+7*side]
+            if rook != None and rook.getOwner() == owner and rook.getType() == ROOK and rook.getHasMoved() == 0:
+                h ^= ZCASTLE[owner*2+side]
+    return h
+
+def hashState(state):
+    """Computes the hash of a state from scratch
+    Args:
+    state- State object
+    Returns: int"""
+    h = 0
+    for p in state.white + state.black:
+        r,f = toCoords(p)
+        h ^= pieceKey(p,r*8+f)
+    h ^= castleKey(state.board)
+    if state.turn == 1:
+        h ^= ZTURN
+    if state.passant >= 0:
+        h ^= ZPASSANT[state.passant]
+    return h
+
+def countMaterial(pieces):
+    """Counts pieces by owner and type
+    Args:
+    pieces- list of Piece or BetterPiece objects
+    Returns: list- 16 counts indexed owner*8+kind with PNBRQK as kinds 0-5
+    and bishops on even/odd squares as kinds 6 and 7"""
+    counts = [0]*16
+    for p in pieces:
+        kind = KINDS[p.getType()]
+        counts[p.getOwner()*8+kind] += 1
+        if kind == 2:
+            r,f = toCoords(p)
+            counts[p.getOwner()*8+6+(r+f)%2] += 1
+    return counts
+
+#---------------------------------------------------------------------------------------------------------------
+
+class Action(object):
     """Describes a potential chess move"""
-    
+    __slots__ = ('piece','dest')
+
     def __init__(self,piece,dest):
         """Constructs Action object
         Args:
@@ -84,25 +214,49 @@ class Action:
             self.piece.move(f+1,r+1,ord(promote))
             
 
+class History(object):
+    """A move in the chain of moves that led to a state
+    Every state points at the move that made it and shares the moves before with its parent, so making a move is O(1)"""
+    __slots__ = ('action','fromrank','parent')
+
+    def __init__(self,action,fromrank,parent):
+        """Constructor
+        Args:
+        action- Action that was made
+        fromrank- int 0-7 rank the piece moved from, a two rank pawn move allows en passant
+        parent- History of the move before or None"""
+        self.action = action
+        self.fromrank = fromrank
+        self.parent = parent
+
 #--------------------------------------------------------------------------------------------------------------
 
-class BetterPiece:
+class BetterPiece(object):
     """A master of disguise. Pretends to be the Piece class but contains additional functionality and can simulate potential moves"""
-    
+    __slots__ = ('rank','file','owner','moved','ID','type')
+    # server Piece objects by Id, kept here so simulated copies don't each carry a reference
+    originals = dict()
+
     def __init__(self,oldpiece):
         """Constructs BetterPiece object
         Args:
         oldpiece- the Piece that this piece is emulating or a BetterPiece to copy"""
-        self.rank = oldpiece.getRank()
-        self.file = oldpiece.getFile()
-        self.owner = oldpiece.getOwner()
-        self.moved = oldpiece.getHasMoved()
-        self.ID = oldpiece.getId()
-        self.type = oldpiece.getType()
         if isinstance(oldpiece,BetterPiece):
-            self.original = oldpiece.original
+            #copying a simulated piece so skip the getters
+            self.rank = oldpiece.rank
+            self.file = oldpiece.file
+            self.owner = oldpiece.owner
+            self.moved = oldpiece.moved
+            self.ID = oldpiece.ID
+            self.type = oldpiece.type
         else:
-            self.original = oldpiece
+            self.rank = oldpiece.getRank()
+            self.file = oldpiece.getFile()
+            self.owner = oldpiece.getOwner()
+            self.moved = oldpiece.getHasMoved()
+            self.ID = oldpiece.getId()
+            self.type = oldpiece.getType()
+            BetterPiece.originals[self.ID] = oldpiece
 
     def getOwner(self):
         """Gets Owner Id
@@ -140,7 +294,7 @@ class BetterPiece:
         _file -int 1-8 of destination file
         rank -int 1-8 of destination rank
         promote- int 0-255 of pawn promotion(use ord)"""
-        self.original.move(_file,rank,promote)
+        BetterPiece.originals[self.ID].move(_file,rank,promote)
 
     def setPos(self,tup):
         """simulates a potential move
@@ -150,30 +304,222 @@ class BetterPiece:
         self.rank = r+1
         self.file = f+1
         self.moved = 1
+
+def newPiece(ID,owner,rank,_file,_type,moved):
+    """Creates a BetterPiece that isn't backed by a server Piece
+    Args:
+    ID- int piece Id
+    owner- int 0,1
+    rank,_file- int 1-8 board position
+    _type- int 0-255 kind of piece(use ord)
+    moved- int 0(No),1(Yes)
+    Returns: BetterPiece"""
+    piece = object.__new__(BetterPiece)
+    piece.ID = ID
+    piece.owner = owner
+    piece.rank = rank
+    piece.file = _file
+    piece.type = _type
+    piece.moved = moved
+    return piece
         
 
 #--------------------------------------------------------------------------------------------------------------
 
+class LRUCache:
+    """Fixed size cache keyed by position hash
+    The least recently stored entry is evicted when full. Lookups don't reorder anything, that costs a pure Python
+    OrderedDict update on the hottest path, so an entry that keeps being used should be stored again to stay fresh"""
+    #rough bytes of OrderedDict bookkeeping per entry on top of the key and value
+    ENTRYOVERHEAD = 250
+
+    def __init__(self,capacity=200000):
+        """Constructor
+        Args:
+        capacity -max number of entries kept"""
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self,key):
+        """Looks up an entry
+        Args:
+        key -int position hash
+        Returns: stored value or None"""
+        value = self.entries.get(key)
+        if value == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self,key,value):
+        """Stores an entry as the most recent, evicting the least recently stored ones if full
+        Args:
+        key -int position hash
+        value -value to store"""
+        if key in self.entries:
+            del self.entries[key]
+        while len(self.entries) >= self.capacity and len(self.entries) > 0:
+            self.entries.popitem(last=False)
+        self.entries[key] = value
+
+    def prune(self,keep):
+        """Removes every entry failing a test
+        Args:
+        keep -function taking a stored value, True if it should stay
+        Returns: int -number of entries removed"""
+        dead = [k for k in self.entries if not keep(self.entries[k])]
+        for k in dead:
+            del self.entries[k]
+        return len(dead)
+
+    def clear(self):
+        """Removes every entry and resets the counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def entrySize(self):
+        """Estimates the bytes used per entry from the 32 most recent entries
+        Returns: int"""
+        sample = []
+        for k in reversed(self.entries):
+            sample.append(sizeOf(k) + sizeOf(self.entries[k]))
+            if len(sample) == 32:
+                break
+        if len(sample) == 0:
+            return 0
+        return sum(sample)/len(sample) + LRUCache.ENTRYOVERHEAD
+
+    def memoryUsage(self):
+        """Estimates the bytes held by the cache
+        Returns: int"""
+        return len(self.entries)*self.entrySize()
+
+    def hitRate(self):
+        """Returns: float -fraction of lookups that hit (0-1)"""
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return float(self.hits)/total
+
+    def __len__(self):
+        return len(self.entries)
+
+def sizeOf(obj):
+    """Finds the size of an object and the tuples and lists inside it
+    Args:
+    obj -any object
+    Returns: int -bytes"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj,(tuple,list)):
+        for each in obj:
+            size += sizeOf(each)
+    return size
+
+def materialKey(state):
+    """Summarizes the material that can only go down as the game goes on
+    Args:
+    state -State object
+    Returns: tuple(int,int) -number of pieces, number of pawns"""
+    return (len(state.white)+len(state.black),state.counts[0]+state.counts[8])
+
 class TransTable:
-    def __init__(self):
-        self.moves = dict()
-        self.eval = dict()
-        self.check = dict()
-
-    def compress(self,state):
-        string = str(state.turn)
-        for i in state.board:
-            for j in i:
-                if j != None:
-                    string += chr(j.getType())
-                else:
-                    string += " "
+    """Caches of move lists, evaluations and best moves keyed by position hash
+    Every entry is stored as (generation,pieces,pawns,data) so entries from old turns
+    or positions that can no longer be reached can be dropped between turns"""
+    #share of the memory ceiling given to each cache
+    SHARES = {'moves':0.68,'eval':0.27,'best':0.05}
+    #starting guesses of bytes per entry, replaced by measurements after the first turn
+    GUESSES = {'moves':3000,'eval':300,'best':350}
+
+    def __init__(self,maxbytes=256*1024*1024,maxage=4):
+        """Constructor
+        Args:
+        maxbytes -memory ceiling for all caches together
+        maxage -number of turns an unused entry survives"""
+        self.maxbytes = maxbytes
+        self.maxage = maxage
+        self.generation = 0
+        self.moves = LRUCache(int(maxbytes*TransTable.SHARES['moves']/TransTable.GUESSES['moves']))
+        self.eval = LRUCache(int(maxbytes*TransTable.SHARES['eval']/TransTable.GUESSES['eval']))
+        self.best = LRUCache(int(maxbytes*TransTable.SHARES['best']/TransTable.GUESSES['best']))
+
+    def caches(self):
+        """Returns: list of (name,LRUCache) pairs"""
+        return [('moves',self.moves),('eval',self.eval),('best',self.best)]
+
+    def reset(self):
+        """Empties every cache, should be called between games"""
+        self.generation = 0
+        for name,cache in self.caches():
+            cache.clear()
+
+    def newTurn(self,root):
+        """Ages out old entries and enforces the memory ceiling
+        Should be called at the start of every turn
+        Args:
+        root -State the turn is searching from
+        Returns: int -number of entries dropped"""
+        self.generation += 1
+        oldest = self.generation - self.maxage
+        pieces,pawns = materialKey(root)
+        #captures and pawn moves can't be undone so positions with more material are unreachable
+        def keep(entry):
+            return entry[0] >= oldest and entry[1] <= pieces and entry[2] <= pawns
+        dropped = 0
+        for name,cache in self.caches():
+            dropped += cache.prune(keep)
+            #resize from measured entry sizes so the ceiling holds during the search
+            size = cache.entrySize()
+            if size > 0:
+                cache.capacity = max(1,int(self.maxbytes*TransTable.SHARES[name]/size))
+                while len(cache) > cache.capacity:
+                    cache.entries.popitem(last=False)
+                    dropped += 1
+        return dropped
+
+    def memoryUsage(self):
+        """Estimates the bytes held by all caches
+        Returns: int"""
+        return sum([cache.memoryUsage() for name,cache in self.caches()])
+
+    def report(self):
+        """Describes the size and hit rate of every cache
+        Returns: str"""
+        string = "TransTable gen %d, %.1f of %.1f MB" % (self.generation,self.memoryUsage()/1048576.0,self.maxbytes/1048576.0)
+        for name,cache in self.caches():
+            string += "\n  %s: %d entries, hit rate %.3f" % (name,len(cache),cache.hitRate())
         return string
 
+    def lookup(self,cache,state):
+        """Finds a cached entry and marks it as used this turn
+        Args:
+        cache -LRUCache to look in
+        state -State to look up
+        Returns: stored data or None"""
+        entry = cache.get(state.hash)
+        if entry == None:
+            return None
+        if entry[0] != self.generation:
+            #storing it again also makes it the most recent, at most once per turn
+            cache.set(state.hash,(self.generation,entry[1],entry[2],entry[3]))
+        return entry[3]
+
+    def store(self,cache,state,data):
+        """Caches data for a state tagged with the current generation and material
+        Args:
+        cache -LRUCache to store in
+        state -State the data belongs to
+        data -value to store"""
+        pieces,pawns = materialKey(state)
+        cache.set(state.hash,(self.generation,pieces,pawns,data))
+
     def getMoves(self,state):
-        key = self.compress(state)
-        if key in self.moves:
-            moves = self.moves[key]
+        moves = self.lookup(self.moves,state)
+        if moves != None:
             newmoves = []
             for each in moves:
                 pos,dest = each
@@ -183,7 +529,6 @@ class TransTable:
             return None
 
     def setMoves(self,state,moves):
-        key = self.compress(state)
         newmoves = []
         for each in moves:
             if each.piece == None:
@@ -191,51 +536,71 @@ class TransTable:
             pos = toCoords(each.piece)
             dest = each.dest
             newmoves.append((pos,dest))
-        self.moves[key] = newmoves
+        self.store(self.moves,state,newmoves)
 
-    def getCheck(self,state):
-        key = self.compress(state)
-        if key in self.check:
-            return self.check[key]
-        else:
-            return None
+    def getEval(self,state):
+        return self.lookup(self.eval,state)
 
-    def setCheck(self,state,check):
-        key = self.compress(state)
-        self.check[key] = check
+    def setEval(self,state,_eval):
+        self.store(self.eval,state,_eval)
 
-    def getEval(self,state):
-        key = self.compress(state)
-        if key in self.eval:
-            return self.eval[key]
-        else:
+    def getBest(self,state,actions):
+        """Finds the move that was best the last time a state was searched
+        Args:
+        state -State to look up
+        actions -list of the state's legal actions
+        Returns: Action from actions or None"""
+        best = self.lookup(self.best,state)
+        if best == None:
+            return None
+        pos,dest = best
+        piece = state.getAtPos(pos)
+        if piece == None:
             return None
+        #the hash could collide so the move is only trusted if it's legal here
+        for each in actions:
+            if each.piece is piece and each.dest == dest:
+                return each
+        return None
 
-    def setEval(self,state,_eval):
-        key = self.compress(state)
-        self.eval[key] = _eval
+    def setBest(self,state,action):
+        """Remembers the best move found for a state, castles aren't kept
+        Args:
+        state -State that was searched
+        action -Action that was best"""
+        if action != None and action.piece != None:
+            self.store(self.best,state,(toCoords(action.piece),action.dest))
         
 
 #--------------------------------------------------------------------------------------------------------------
 
-class State:
-    """Describes a layout of a chess board"""
+class SearchTimeout(Exception):
+    """Raised by State.move once State.deadline has passed so a search can be abandoned"""
+    pass
+
+class State(object):
+    """Describes a layout of a chess board
+    The board is a flat list of 64 squares indexed rank*8+file"""
+    __slots__ = ('board','black','white','stale','turn','quiet','history','passant','hash','reps','counts','attacks')
     heuristic = composite
     table = TransTable()
+    #number of states made by move, for statistics
+    nodes = 0
+    #time.time() after which move raises SearchTimeout, None for no limit
+    deadline = None
     def generateFromGameData(self,pieces,lastmoves,player,staleturns):
         """Creates a State from the list of pieces from the server
         Args:
-        pieces- a list of Pieces
-        lastmoves- list of 8 last moves
+        pieces- a list of Pieces, or the turn's PieceData snapshot
+        lastmoves- list of the last moves as Moves or MoveData, most recent first
         player- player ID at move
         staleturns- int turns util 100 move stalemate"""
         #create empty board
-        self.board = []
+        self.board = [None]*64
         self.black = []
         self.white = []
         self.stale = staleturns
-        for i in range(8):
-            self.board.append([None,None,None,None,None,None,None,None])
+        BetterPiece.originals.clear()
         for p in pieces:
             #replace piece objects with betterpiece objects
             p = BetterPiece(p)
@@ -246,19 +611,198 @@ class State:
                 self.black.append(p)
             #place pieces on the board
             r,f = toCoords(p)
-            self.board[r][f] = p
+            self.board[r*8+f] = p
 
         self.turn = player
         self.quiet = True
-        self.lastmoves = []
-        self.lastrank = []
-        i = 0
-        for each in lastmoves:
-            self.lastmoves.append(toAction(each,self))
-            self.lastrank.append(each.getFromRank()-1)
-            i += 1
-            if i == 9:
+        #link the last moves oldest first so the history ends at the most recent
+        self.history = None
+        for each in reversed(lastmoves[:9]):
+            self.history = History(toAction(each,self),each.getFromRank()-1,self.history)
+
+        #file of a pawn that just moved two spaces
+        self.passant = -1
+        last = self.history
+        if last != None and last.action.piece != None and chr(last.action.piece.getType()) == 'P':
+            r,f = last.action.dest
+            if abs(last.fromrank-r) == 2:
+                self.passant = f
+        self.hash = hashState(self)
+        self.counts = countMaterial(self.white + self.black)
+
+        #rebuild hashes of the earlier positions since the last irreversible move by undoing moves
+        reps = []
+        board = self.board[:]
+        h = self.hash
+        if self.passant >= 0:
+            h ^= ZPASSANT[self.passant]
+        for i in range(min(101-staleturns,len(lastmoves))):
+            each = lastmoves[i]
+            frm = (each.getFromRank()-1)*8+each.getFromFile()-1
+            to = (each.getToRank()-1)*8+each.getToFile()-1
+            p = board[to]
+            if i == 100-staleturns or p == None or chr(p.getType()) == 'P':
+                #reached the last irreversible move, the oldest position keeps its en passant key
+                if len(reps) > 0 and p != None and chr(p.getType()) == 'P' and abs(frm//8-to//8) == 2:
+                    reps[-1] ^= ZPASSANT[to%8]
                 break
+            #a king or rook leaving its back rank might have been its first move
+            if board[frm] != None or (chr(p.getType()) in 'KR' and frm//8 == 7*p.getOwner()):
+                break
+            board[frm] = p
+            board[to] = None
+            h ^= pieceKey(p,to) ^ pieceKey(p,frm) ^ ZTURN
+            reps.append(h)
+        reps.reverse()
+        self.reps = tuple(reps)
+        self.attacks = None
+        self.clearRepetition()
+
+    def matchGameData(self,pieces,staleturns):
+        """Checks a state carried over from an earlier turn against the pieces from the server
+        and points its pieces at this turn's server objects so actions can be executed
+        Args:
+        pieces- a list of Pieces, or the turn's PieceData snapshot
+        staleturns- int turns util 100 move stalemate
+        Returns: bool- False if the board differs, it should be rebuilt with generateFromGameData"""
+        if len(pieces) != len(self.white)+len(self.black):
+            return False
+        for p in pieces:
+            mine = self.board[(p.getRank()-1)*8+p.getFile()-1]
+            if mine == None or mine.ID != p.getId() or mine.owner != p.getOwner() or mine.type != p.getType() or mine.moved != p.getHasMoved():
+                return False
+        BetterPiece.originals.clear()
+        for p in pieces:
+            BetterPiece.originals[p.getId()] = p
+        #the server's count is the one that ends the game
+        self.stale = staleturns
+        return True
+
+    def generateFromFEN(self,fen):
+        """Creates a State from a FEN string
+        Missing fields after the piece placement default to white to move, no castling, no en passant and a clock of 0
+        Args:
+        fen- str with piece placement, side to move, castling rights, en passant square and halfmove clock"""
+        fields = fen.split()
+        placement = fields[0]
+        castling = "-"
+        if len(fields) > 2:
+            castling = fields[2]
+        halfmove = 0
+        if len(fields) > 4:
+            halfmove = int(fields[4])
+        #castling rights of each owner as upper case letters
+        rights = [[c for c in castling if c.isupper()],[c.upper() for c in castling if c.islower()]]
+        #create empty board
+        self.board = [None]*64
+        self.black = []
+        self.white = []
+        self.stale = 100-halfmove
+        ID = 0
+        r = 7
+        for row in placement.split('/'):
+            f = 0
+            for c in row:
+                if c.isdigit():
+                    f += int(c)
+                    continue
+                owner = 0
+                if c.islower():
+                    owner = 1
+                c = c.upper()
+                moved = 1
+                if c == 'P' and r == 1+5*owner:
+                    moved = 0
+                #kings and rooks count as unmoved when a castling right still needs them
+                if r == 7*owner and c == 'K' and f == 4 and len(rights[owner]) > 0:
+                    moved = 0
+                if r == 7*owner and c == 'R' and ((f == 7 and 'K' in rights[owner]) or (f == 0 and 'Q' in rights[owner])):
+                    moved = 0
+                p = newPiece(ID,owner,r+1,f+1,ord(c),moved)
+                ID += 1
+                if owner == 0:
+                    self.white.append(p)
+                else:
+                    self.black.append(p)
+                self.board[r*8+f] = p
+                f += 1
+            r -= 1
+
+        self.turn = 0
+        if len(fields) > 1 and fields[1] == 'b':
+            self.turn = 1
+        self.quiet = True
+        self.history = None
+        self.passant = -1
+        if len(fields) > 3 and fields[3] != '-':
+            #rebuild the double pawn push that made the en passant square
+            f = ord(fields[3][0])-ord('a')
+            r = int(fields[3][1])-1
+            if r == 2:
+                pawnrank,fromrank = 3,1
+            else:
+                pawnrank,fromrank = 4,6
+            pawn = self.board[pawnrank*8+f]
+            if pawn != None and chr(pawn.getType()) == 'P':
+                self.history = History(Action(pawn,(pawnrank,f)),fromrank,None)
+                self.passant = f
+        self.hash = hashState(self)
+        self.counts = countMaterial(self.white + self.black)
+        self.reps = ()
+        self.attacks = None
+
+    def toFEN(self):
+        """Describes this state as a FEN string
+        The fullmove number isn't tracked so it is always 1
+        Returns: str"""
+        rows = []
+        for r in range(7,-1,-1):
+            row = ""
+            empty = 0
+            for f in range(8):
+                p = self.board[r*8+f]
+                if p == None:
+                    empty += 1
+                    continue
+                if empty > 0:
+                    row += str(empty)
+                    empty = 0
+                if p.getOwner() == 0:
+                    row += chr(p.getType())
+                else:
+                    row += chr(p.getType()).lower()
+            if empty > 0:
+                row += str(empty)
+            rows.append(row)
+
+        castling = ""
+        for owner in [0,1]:
+            r = 7*owner
+            king = self.board[r*8+4]
+            if king == None or chr(king.getType()) != 'K' or king.getOwner() != owner or king.getHasMoved() != 0:
+                continue
+            for f,letter in [(7,'K'),(0,'Q')]:
+                rook = self.board[r*8+f]
+                if rook != None and chr(rook.getType()) == 'R' and rook.getOwner() == owner and rook.getHasMoved() == 0:
+                    if owner == 0:
+                        castling += letter
+                    else:
+                        castling += letter.lower()
+        if castling == "":
+            castling = "-"
+
+        passant = "-"
+        if self.passant >= 0:
+            #the square behind the pawn of the side that just moved
+            passant = chr(ord('a')+self.passant) + str(6-3*self.turn)
+
+        return " ".join(["/".join(rows),"wb"[self.turn],castling,passant,str(100-self.stale),"1"])
+
+    def clearRepetition(self):
+        """Drops this position's own hash from the repetition window
+        A root that repeats an earlier position isn't over, so it has to be searchable,
+        while positions in the search that return to it still count as repeats"""
+        self.reps = tuple([h for h in self.reps if h != self.hash])
 
     def getAtPos(self,tup):
         """Finds the pieces at at board position
@@ -266,7 +810,102 @@ class State:
         tup- tuple of rank,file coords 0-7
         Returns: BetterPiece"""
         r,f = tup
-        return self.board[r][f]
+        return self.board[r*8+f]
+
+    def getAttackMap(self,player):
+        """Finds the pieces attacking every square, worked out the first time a side is asked for and kept with the state
+        Args:
+        player- Id 0,1 of the attacking player
+        Returns: list- 64 lists of the square indices of the player's attacking pieces, indexed rank*8+file"""
+        #both maps then both mobility counts
+        if self.attacks == None:
+            self.attacks = [None,None,0,0]
+        found = self.attacks[player]
+        if found != None:
+            return found
+        found = [[] for sq in range(64)]
+        board = self.board
+        if player == 0:
+            mypieces = self.white
+        else:
+            mypieces = self.black
+        moves = 0
+        for p in mypieces:
+            sq = (p.rank-1)*8+p.file-1
+            kind = p.type
+            if kind == PAWN:
+                #pawns don't move where they attack so they add no mobility
+                for t in PAWNTARGETS[player][sq]:
+                    found[t].append(sq)
+            elif kind in STEPTARGETS:
+                for t in STEPTARGETS[kind][sq]:
+                    found[t].append(sq)
+                    if board[t] == None or board[t].owner != player:
+                        moves += 1
+            else:
+                #sliders attack along each ray up to and including the first piece
+                for ray in SLIDERRAYS[kind][sq]:
+                    for t in ray:
+                        found[t].append(sq)
+                        if board[t] != None:
+                            if board[t].owner != player:
+                                moves += 1
+                            break
+                        moves += 1
+        self.attacks[player] = found
+        self.attacks[2+player] = moves
+        return found
+
+    def getMobility(self,player):
+        """Counts the moves of a player's pieces other than pawns, ignoring checks and pins
+        Args:
+        player- Id 0,1 of the moving player
+        Returns: int"""
+        self.getAttackMap(player)
+        return self.attacks[2+player]
+
+    def getAttackers(self,tup,player,gone=()):
+        """Finds a player's pieces that attack a square
+        Args:
+        tup- tuple of rank,file coords 0-7
+        player- Id 0,1 of the attacking player
+        gone- square indices rank*8+file to treat as empty, lets pieces behind them attack
+        Returns: list- of (int,BetterPiece) square index and piece"""
+        r,f = tup
+        board = self.board
+        if len(gone) == 0:
+            return [(sq,board[sq]) for sq in self.getAttackMap(player)[r*8+f]]
+        found = []
+        #pawns attack from one rank behind their direction of travel
+        pr = r-1 if player == 0 else r+1
+        if 0 <= pr < 8:
+            for pf in (f-1,f+1):
+                if 0 <= pf < 8:
+                    sq = pr*8+pf
+                    p = board[sq]
+                    if p != None and p.owner == player and p.type == PAWN and not sq in gone:
+                        found.append((sq,p))
+        for steps,kind in ((KNIGHTSTEPS,KNIGHT),(KINGSTEPS,KING)):
+            for dr,df in steps:
+                nr,nf = r+dr,f+df
+                if 0 <= nr < 8 and 0 <= nf < 8:
+                    sq = nr*8+nf
+                    p = board[sq]
+                    if p != None and p.owner == player and p.type == kind and not sq in gone:
+                        found.append((sq,p))
+        for steps,kinds in ((DIAGONALS,(BISHOP,QUEEN)),(LINES,(ROOK,QUEEN))):
+            for dr,df in steps:
+                nr,nf = r+dr,f+df
+                while 0 <= nr < 8 and 0 <= nf < 8:
+                    sq = nr*8+nf
+                    p = board[sq]
+                    if p != None and not sq in gone:
+                        if p.owner == player and p.type in kinds:
+                            found.append((sq,p))
+                        break
+                    nr += dr
+                    nf += df
+        return found
 
     def move(self,action):
         """Simulates a potential move
@@ -274,7 +913,7 @@ class State:
         action- Action object of move that should be taken
         Returns: State- board after move have been made"""
         # creates a copy of the board and lists
-        newboard = [row[:] for row in self.board]
+        newboard = self.board[:]
         newwhite = self.white[:]
         newblack = self.black[:]
         quiet = True
@@ -283,28 +922,37 @@ class State:
         temprank = -1
         #checks if should update turns to stalemate
         refresh = False
+        #material only changes on captures and promotions so the counts are shared otherwise
+        counts = self.counts
         if action.piece == None:
             (king,kpos),(rook,rpos) = action.dest
             quiet = False
             #king
             #Clear board of piece's last pos
             r,f = toCoords(king)
-            newboard[r][f] = None
+            newboard[r*8+f] = None
+            hsh = self.hash ^ pieceKey(king,r*8+f)
             temprank = r
             #copy piece and place at new pos
             r,f = kpos
             newking = BetterPiece(king)
-            newboard[r][f] = newking
+            newboard[r*8+f] = newking
             newking.setPos(kpos)
+            hsh ^= pieceKey(newking,r*8+f)
             #rook
             #Clear board of piece's last pos
             r,f = toCoords(rook)
-            newboard[r][f] = None
+            newboard[r*8+f] = None
+            hsh ^= pieceKey(rook,r*8+f)
             #copy piece and place at new pos
             r,f = rpos
             newrook = BetterPiece(rook)
-            newboard[r][f] = newrook
+            newboard[r*8+f] = newrook
             newrook.setPos(rpos)
+            hsh ^= pieceKey(newrook,r*8+f)
+            reversible = False
+            rights = True
+            passant = -1
             #update peice list
             if newking.getOwner()==0:
                 newwhite.remove(rook)
@@ -322,7 +970,7 @@ class State:
             capture = self.getAtPos(action.dest)
             #Clear board of peice's last pos
             oldr,oldf = toCoords(action.piece)
-            newboard[oldr][oldf] = None
+            newboard[oldr*8+oldf] = None
             temprank = oldr
             #copy piece and place at new pos
             r,f = action.dest
@@ -333,12 +981,23 @@ class State:
                     # promote
                     newpiece.type = ord('Q')
                     quiet = False
+                    counts = counts[:]
+                    counts[newpiece.getOwner()*8] -= 1
+                    counts[newpiece.getOwner()*8+4] += 1
                 #enpassent (change file without landing on a piece)
                 if capture == None and oldf != f:
                     #captured piece is actually at the old rank and the new file
                     capture = self.getAtPos((oldr,f))
-            newboard[r][f] = newpiece
+                    newboard[oldr*8+f] = None
+            newboard[r*8+f] = newpiece
             newpiece.setPos(action.dest)
+            hsh = self.hash ^ pieceKey(action.piece,oldr*8+oldf) ^ pieceKey(newpiece,r*8+f)
+            #pawn moves and first moves of kings and rooks can't be undone
+            rights = action.piece.getHasMoved() == 0 and KINDS[action.piece.getType()] in UNMOVED
+            reversible = not refresh and not rights
+            passant = -1
+            if refresh and abs(oldr-r) == 2:
+                passant = f
             # update piece list
             if newpiece.getOwner() == 0:
                 newwhite.remove(action.piece)
@@ -350,12 +1009,27 @@ class State:
             if capture != None:
                 quiet = False
                 refresh = True
+                reversible = False
+                cr,cf = toCoords(capture)
+                hsh ^= pieceKey(capture,cr*8+cf)
+                #taking a rook that could still castle takes away the right
+                rights = rights or (capture.getHasMoved() == 0 and capture.getType() == ROOK)
+                if counts is self.counts:
+                    counts = counts[:]
+                kind = KINDS[capture.getType()]
+                counts[capture.getOwner()*8+kind] -= 1
+                if kind == 2:
+                    counts[capture.getOwner()*8+6+(cr+cf)%2] -= 1
                 if capture.getOwner()==0:
                     newwhite.remove(capture)
                 else:
                     newblack.remove(capture)
 
         #put data in new state object
+        State.nodes += 1
+        #the clock is only read every 256 states to keep the check cheap
+        if State.deadline != None and State.nodes & 255 == 0 and time.time() > State.deadline:
+            raise SearchTimeout()
         newstate = State()
         newstate.board = newboard
         newstate.white = newwhite
@@ -363,11 +1037,26 @@ class State:
         newstate.quiet = quiet
 
         #update last move data
-        newstate.lastmoves = [action] + self.lastmoves
-        newstate.lastrank = [temprank] + self.lastrank
+        newstate.history = History(action,temprank,self.history)
         
         # toggle turn
         newstate.turn = 1 - self.turn
+        hsh ^= ZTURN
+        if rights:
+            hsh ^= castleKey(self.board) ^ castleKey(newboard)
+        if self.passant >= 0:
+            hsh ^= ZPASSANT[self.passant]
+        if passant >= 0:
+            hsh ^= ZPASSANT[passant]
+        newstate.passant = passant
+        newstate.hash = hsh
+        newstate.counts = counts
+        newstate.attacks = None
+        #positions since the last irreversible move for repetition checks
+        if reversible:
+            newstate.reps = self.reps + (self.hash,)
+        else:
+            newstate.reps = ()
         #count down or refresh 100 turns
         if refresh:
             newstate.stale = 100
@@ -381,60 +1070,47 @@ class State:
         Does not check for no moves stalemate
         Args:
         player- Player to find utility value for
-        Returns: float utility value"""
+        Returns: int score or None if the game goes on"""
         if self.stale == 0:
             #ran out of moves
-            return 0.5
-        #check repetition
-        if len(self.lastmoves) >= 8:
-            repeat = True
-            for i in [0,1,2,3]:
-                if not self.lastmoves[i].equals(self.lastmoves[i+4]):
-                    repeat = False
-                    break
-            if repeat:
-                return 0.5
-        rpqcount = 0 #count of rook pawn queen
-        ncount = 0 #count of knights
-        wbish = [0,0] #count of even/odd bishops
-        bbish = [0,0]
-        for p in self.white:
-            if chr(p.getType()) == "P" or chr(p.getType()) == "R" or chr(p.getType()) == "Q":
-                rpqcount += 1
-            if chr(p.getType()) == "N":
-                ncount += 1
-            if chr(p.getType()) == "B":
-                r,f = toCoords(p)
-                wbish[(r+f)%2] += 1
-        for p in self.black:
-            if chr(p.getType()) == "P" or chr(p.getType()) == "R" or chr(p.getType()) == "Q":
-                rpqcount += 1
-            if chr(p.getType()) == "N":
-                ncount += 1
-            if chr(p.getType()) == "B":
-                r,f = toCoords(p)
-                bbish[(r+f)%2] += 1
+            return DRAW
+        #check repetition, the turn is part of the hash so only same side positions can match
+        if len(self.reps) >= 4 and self.hash in self.reps:
+            return DRAW
+        if self.insufficientMaterial():
+            # stalemate by material
+            return DRAW
+        return None
+
+    def insufficientMaterial(self):
+        """Checks if neither player has enough material left to checkmate
+        Returns: bool- True if the game is a draw by material"""
+        c = self.counts
+        rpqcount = c[0]+c[3]+c[4]+c[8]+c[11]+c[12] #count of rook pawn queen
+        ncount = c[1]+c[9] #count of knights
+        wbish = c[6:8] #count of even/odd bishops
+        bbish = c[14:16]
         # cases that are not a stalemate
         if rpqcount > 0 or ncount > 1 or (ncount > 0 and wbish[0]+wbish[1]+bbish[0]+bbish[1] > 0):
-            return -1
+            return False
         if (wbish[0] > 0 and bbish[1] > 0) or (wbish[1] > 0 and bbish[0] > 0):
-            return -1
-        # stalemate by material
-        return 0.5
+            return False
+        return True
         
     def evaluate(self,player):
         """Estimates the current Utility value of this state using the heuristic specified in the static varible
         Args:
         player- player to estimate for
-        Returns: float -estimated utility value (0.0-1.0)
+        Returns: int -estimated score, see EvalHeuristics
         """
-        history = State.table.getEval(self)
-        if history == None:
-            new = State.heuristic(self,player)
-            State.table.setEval(self,new)
-            return new
-        else:
-            return history
+        #values are cached from white's point of view and negated for black
+        value = State.table.getEval(self)
+        if value == None:
+            value = toScore(State.heuristic(self,0))
+            State.table.setEval(self,value)
+        if player == 0:
+            return value
+        return -value
 
     def isInCheck(self,player):
         """Determines if the player is in check on this board
@@ -443,141 +1119,11 @@ class State:
         Returns: bool- True if in check"""
         if player == 0:
             mypieces = self.white
-            direction = 1
         else:
             mypieces = self.black
-            direction = -1
-
-        r = -1
-        f = -1
-        # get king position
         for p in mypieces:
-            if chr(p.getType()) == 'K':
-                r,f =toCoords(p)
-
-        # check queens rooks and bishops
-        for i in range(1,9):
-            pos = (r+i,f+i)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'B' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-                
-        for i in range(1,9):
-            pos = (r-i,f+i)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'B' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-        for i in range(1,9):
-            pos = (r+i,f-i)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'B' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-        for i in range(1,9):
-            pos = (r-i,f-i)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'B' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-        for i in range(1,9):
-            pos = (r+i,f)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'R' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-        for i in range(1,9):
-            pos = (r-i,f)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'R' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-        for i in range(1,9):
-            pos = (r,f+i)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'R' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-        for i in range(1,9):
-            pos = (r,f-i)
-            if isValidPos(pos):
-                if self.getAtPos(pos) != None:
-                    if self.getAtPos(pos).getOwner() != player and (chr(self.getAtPos(pos).getType()) == 'R' or chr(self.getAtPos(pos).getType()) == 'Q'):
-                        return True
-                    else:
-                        break
-            else:
-                break
-        
-        #Pawns
-        moves = []
-        moves.append((r+direction,f-1)) #attack from left
-        moves.append((r+direction,f+1)) #attack from right
-
-        for pos in moves:
-            if isValidPos(pos) and self.getAtPos(pos) != None and self.getAtPos(pos).getOwner() != player and chr(self.getAtPos(pos).getType()) == 'P':
-                return True
-
-        #knights
-        moves = []
-        moves.append((r+2,f+1))
-        moves.append((r+2,f-1))
-        moves.append((r+1,f+2))
-        moves.append((r+1,f-2))
-        moves.append((r-1,f+2))
-        moves.append((r-1,f-2))
-        moves.append((r-2,f+1))
-        moves.append((r-2,f-1))
-
-        for pos in moves:
-            if isValidPos(pos) and self.getAtPos(pos) != None and self.getAtPos(pos).getOwner() != player and chr(self.getAtPos(pos).getType()) == 'N':
-                return True
-            
-        # Kings
-        moves = []
-        moves.append((r+1,f+1))
-        moves.append((r+1,f-1))
-        moves.append((r-1,f+1))
-        moves.append((r-1,f-1))
-        moves.append((r+1,f))
-        moves.append((r-1,f))
-        moves.append((r,f+1))
-        moves.append((r,f-1))
-
-        for pos in moves:
-            if isValidPos(pos) and self.getAtPos(pos) != None and self.getAtPos(pos).getOwner() != player and chr(self.getAtPos(pos).getType()) == 'K':
-                return True
-
-        #if passed all loops then its not in check
+            if p.type == KING:
+                return len(self.getAttackMap(1-player)[(p.rank-1)*8+p.file-1]) > 0
         return False
 
     def getMoves(self,player):
@@ -819,44 +1365,40 @@ class State:
                     actions.append(Action(p,pos))
                     
         #Passing
-        #if there was a previous move, the move wasn't a castle and it was by a pawn
-        if len(self.lastmoves) > 0 and self.lastmoves[0].piece != None and chr(self.lastmoves[0].piece.getType()) == 'P':
-            r1 = self.lastrank[0]
-            r2,f2 = self.lastmoves[0].dest
-            if abs(r1-r2) == 2: #last move was two
-                a1 = (r2,f2-1) #pass on left
-                a2 = (r2,f2+1) #pass on right
-                # is there space on left and a pawn in the space that belongs to me
-                if isValidPos(a1) and self.getAtPos(a1) != None and self.getAtPos(a1).getOwner == player and chr(self.getAtPos(a1).getType()) == 'P': 
-                    actions.append(Action(self.getAtPos(a1),(r2+dir,f2)))
-                # is there space on right and a pawn in the space that belongs to me
-                if isValidPos(a2) and self.getAtPos(a2) != None and self.getAtPos(a2).getOwner == player and chr(self.getAtPos(a2).getType()) == 'P':
-                    actions.append(Action(self.getAtPos(a2),(r2+dir,f2)))
+        #if the last move pushed a pawn two spaces my pawns beside it can take it
+        if self.passant >= 0:
+            r2 = 4-player #rank the pushed pawn landed on
+            f2 = self.passant
+            for pos in [(r2,f2-1),(r2,f2+1)]:
+                # is there space on this side and a pawn in the space that belongs to me
+                if isValidPos(pos) and self.getAtPos(pos) != None and self.getAtPos(pos).getOwner() == player and chr(self.getAtPos(pos).getType()) == 'P':
+                    actions.append(Action(self.getAtPos(pos),(r2+direction,f2)))
 
         #Castling
         if king != None and king.getHasMoved() == 0 and not self.isInCheck(player):
             kr,kf = toCoords(king)
+            attacked = self.getAttackMap(1-player)
             for rook in [rook1,rook2]:
                 if rook != None and rook.getHasMoved() == 0:
                     rr,rf = toCoords(rook)
                     # castle right
-                    if rf > kf and (not self.move(Action(king,(kr,kf+1))).isInCheck(player)):
+                    if rf > kf and len(attacked[kr*8+kf+1]) == 0:
                         clear = True
                         # check that no pieces are between the king and rook
                         for f in range(kf+1,rf):
-                            if self.board[kr][f] != None:
+                            if self.board[kr*8+f] != None:
                                 clear = False
                         if clear:
                             kpos = (kr,kf+2)
                             rpos = (kr,kf+1)
                             # Special parameters for castling piece is none and destination holds parameters for two actions
                             actions.append(Action(None,((king,kpos),(rook,rpos))))
-                    elif rf < kf and (not self.move(Action(king,(kr,kf-1))).isInCheck(player)):
+                    elif rf < kf and len(attacked[kr*8+kf-1]) == 0:
                         # castle left
                         clear = True
                         # check that no pieces are between the king and rook
                         for f in range(rf+1,kf):
-                            if self.board[kr][f] != None or self.move(Action(king,(kr,f))).isInCheck(player):
+                            if self.board[kr*8+f] != None or len(attacked[kr*8+f]) > 0:
                                 clear = False
                         if clear:
                             kpos = (kr,kf-2)
@@ -865,8 +1407,26 @@ class State:
                             actions.append(Action(None,((king,kpos),(rook,rpos))))
 
         # Clean list of illegal moves
+        #out of check only a king move or uncovering a slider's line to the king can be illegal,
+        #a piece pinned to its king is attacked by the pinning slider
+        attacked = self.getAttackMap(1-player)
+        safe = king != None and len(attacked[(king.rank-1)*8+king.file-1]) == 0
         i = 0
         while i < len(actions):
+            p = actions[i].piece
+            if safe and p != None:
+                r,f = actions[i].dest
+                if p is king:
+                    if len(attacked[r*8+f]) > 0:
+                        del actions[i]
+                    else:
+                        i = i+1
+                    continue
+                sq = (p.rank-1)*8+p.file-1
+                passant = p.type == PAWN and f != p.file-1 and self.board[r*8+f] == None
+                if not passant and not [a for a in attacked[sq] if self.board[a].type in SLIDERRAYS]:
+                    i = i+1
+                    continue
             if self.move(actions[i]).isInCheck(player):
                 del actions[i]
             else:
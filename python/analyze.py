@@ -0,0 +1,143 @@
+#!/bin/env python
+##################################
+# analyze.py
+# Runs the search on FEN positions without the game server or libclient
+# Usage: python analyze.py --fen "<fen>" [--depth N] [--time SECONDS] [--search NAME] [--multipv N] [--extensions SPEC] [--trace FILE]
+#        python analyze.py --file positions.fen ...
+##################################
+
+from Utils import *
+from Minimax import *
+from OrderHeuristics import HistoryTable
+from Tracer import Tracer, WINDOWS
+import argparse, math, time
+
+#extensions used by the ext search, main replaces them with the ones given on the command line
+EXTENSIONS = Extensions()
+
+#records the searches when --trace is given and the file its dump is written to
+TRACER = None
+TRACEPATH = None
+
+#each search takes the state, depth, number of moves wanted and history table and returns a list of (value,pv)
+SEARCHES = {
+    'minimax': lambda state,depth,count,table: [wrap(minimax(state,state.turn,depth))],
+    'ab': lambda state,depth,count,table: [wrap(abMinimax(state,state.turn,depth,-INFINITY,INFINITY))],
+    'order': lambda state,depth,count,table: [wrap(abOrderMinimax(state,state.turn,depth,-INFINITY,INFINITY,table))],
+    'qui': lambda state,depth,count,table: [wrap(abQuiOrderMinimax(state,state.turn,depth,math.floor(math.sqrt(depth)),-INFINITY,INFINITY,table))],
+    'pv': lambda state,depth,count,table: multiPV(state,depth,count,table),
+    'ext': lambda state,depth,count,table: [wrap(extMinimax(state,state.turn,depth*PLY,-INFINITY,INFINITY,table,EXTENSIONS))],
+}
+
+def wrap(result):
+    """Turns a (value,action) search result into a (value,pv) pair"""
+    value,action = result
+    if action == None:
+        return (value,[])
+    return (value,[action])
+
+def parseExtensions(spec):
+    """Makes Extensions from text like check=4,recapture=2,limit=8 with amounts in PLY units
+    Args:
+    spec -str comma separated name=units pairs, names left out keep their defaults
+    Returns: Extensions"""
+    amounts = {}
+    for part in spec.split(','):
+        if part.strip() != "":
+            name,units = part.split('=')
+            amounts[name.strip()] = int(units)
+    return Extensions(**amounts)
+
+def pvString(pv):
+    """Returns: str -the actions of a principal variation separated by commas"""
+    return ", ".join([a.toStr() for a in pv])
+
+def analyze(fen,search,maxdepth,limit,count):
+    """Runs iterative deepening on one position and prints every iteration
+    Args:
+    fen -str position to search
+    search -name of a search in SEARCHES
+    maxdepth -int deepest iteration
+    limit -float seconds after which no new iteration is started, None for no limit
+    count -int number of moves to report for the pv search"""
+    state = State()
+    state.generateFromFEN(fen)
+    State.table.reset()
+    EXTENSIONS.reset()
+    table = HistoryTable()
+    print "Position: ", fen
+    print "To move: ", ["white","black"][state.turn]
+    if len(state.getMoves(state.turn)) == 0:
+        print "No legal moves"
+        return
+    starttime = time.time()
+    startnodes = State.nodes
+    results = []
+    if TRACER != None:
+        TRACER.clear()
+    for depth in range(1,maxdepth+1):
+        results = SEARCHES[search](state,depth,count,table)
+        table.age()
+        elapsed = time.time()-starttime
+        nodes = State.nodes-startnodes
+        print "depth %2d  nodes %9d  time %7.2fs  nps %7.0f" % (depth,nodes,elapsed,nodes/max(elapsed,0.001))
+        for value,pv in results:
+            print "    %-12s %s" % (scoreString(value),pvString(pv))
+        if limit != None and elapsed >= limit:
+            break
+    value,pv = results[0]
+    print "Best move: ", pv[0].toStr()
+    print "Score: ", scoreString(value)
+    print "PV: ", pvString(pv)
+    if search == 'ext':
+        print EXTENSIONS.report()
+    print State.table.report()
+    if TRACER != None:
+        print "Trace: ", TRACER.dump(TRACEPATH,fen), " records written to ", TRACEPATH
+    print
+
+def main():
+    parser = argparse.ArgumentParser(description="Search chess positions without the game server")
+    parser.add_argument("--fen",help="position to analyze")
+    parser.add_argument("--file",help="file with one FEN per line, lines starting with # are skipped")
+    parser.add_argument("--depth",type=int,help="deepest iteration (default 3, or unbounded with --time)")
+    parser.add_argument("--time",type=float,help="seconds after which no new iteration is started")
+    parser.add_argument("--search",choices=sorted(SEARCHES.keys()),default="pv",help="search function to run (default pv)")
+    parser.add_argument("--multipv",type=int,default=1,help="number of best moves to show with the pv search")
+    parser.add_argument("--seed",type=int,default=0,help="seed for the eval noise, runs with the same seed search the same states")
+    parser.add_argument("--extensions",help="extensions for the ext search in 1/%d ply units, like check=4,single=3,recapture=2,pawn7=2,limit=8" % PLY)
+    parser.add_argument("--trace",help="file the search trace of the last position is written to, view it with traceview.py")
+    parser.add_argument("--trace-size",type=int,default=200000,help="records kept by the tracer")
+    args = parser.parse_args()
+    setNoiseSeed(args.seed)
+    if args.trace != None:
+        global TRACER, TRACEPATH
+        TRACER = Tracer(args.trace_size)
+        TRACEPATH = args.trace
+        TRACER.enable(WINDOWS.keys())
+    if args.extensions != None:
+        global EXTENSIONS
+        EXTENSIONS = parseExtensions(args.extensions)
+
+    fens = []
+    if args.fen != None:
+        fens.append(args.fen)
+    if args.file != None:
+        for line in open(args.file):
+            line = line.strip()
+            if line != "" and not line.startswith("#"):
+                fens.append(line)
+    if len(fens) == 0:
+        parser.error("give a position with --fen or --file")
+
+    maxdepth = args.depth
+    if maxdepth == None:
+        if args.time == None:
+            maxdepth = 3
+        else:
+            maxdepth = 100
+    for fen in fens:
+        analyze(fen,args.search,maxdepth,args.time,args.multipv)
+
+if __name__ == '__main__':
+    main()
@@ -74,6 +74,56 @@ library.getPlayer.argtypes = [c_void_p, c_int]
 library.getPlayerCount.restype = c_int
 library.getPlayerCount.argtypes = [c_void_p]
 
+# snapshot
+
+#Plain copies of the game objects filled in bulk by getSnapshot, laid out like _MoveData, _PieceData and _PlayerData
+#They read like the GameObject wrappers without a library call per getter but are only good for the turn they were taken
+class MoveData(Structure):
+  _fields_ = [("ptr", c_void_p), ("id", c_int), ("fromFile", c_int), ("fromRank", c_int),
+              ("toFile", c_int), ("toRank", c_int), ("promoteType", c_int)]
+  def getId(self):
+    return self.id
+  def getFromFile(self):
+    return self.fromFile
+  def getFromRank(self):
+    return self.fromRank
+  def getToFile(self):
+    return self.toFile
+  def getToRank(self):
+    return self.toRank
+  def getPromoteType(self):
+    return self.promoteType
+
+class PieceData(Structure):
+  _fields_ = [("ptr", c_void_p), ("id", c_int), ("owner", c_int), ("file", c_int),
+              ("rank", c_int), ("hasMoved", c_int), ("type", c_int)]
+  def move(self, file, rank, type):
+    return library.pieceMove(self.ptr, file, rank, type)
+  def getId(self):
+    return self.id
+  def getOwner(self):
+    return self.owner
+  def getFile(self):
+    return self.file
+  def getRank(self):
+    return self.rank
+  def getHasMoved(self):
+    return self.hasMoved
+  def getType(self):
+    return self.type
+
+class PlayerData(Structure):
+  _fields_ = [("ptr", c_void_p), ("id", c_int), ("playerName", c_char_p), ("time", c_float)]
+  def getId(self):
+    return self.id
+  def getPlayerName(self):
+    return self.playerName
+  def getTime(self):
+    return self.time
+
+library.getSnapshot.restype = c_int
+library.getSnapshot.argtypes = [c_void_p, POINTER(MoveData), c_int, POINTER(PieceData), c_int, POINTER(PlayerData), c_int]
+
 # getters
 
 #Data
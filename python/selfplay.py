@@ -0,0 +1,237 @@
+#!/bin/env python
+##################################
+# selfplay.py
+# Plays engine configurations against each other without the game server
+# Usage: python selfplay.py --a qui --b order:4 --games 200 --processes 4 --clock 60 --out results.jsonl
+##################################
+
+from Utils import *
+from OrderHeuristics import HistoryTable
+from analyze import SEARCHES
+from Minimax import Extensions, abMinimax, rootGap, PLY
+from TimeManager import TimeManager, EASYGAP
+from multiprocessing import Pool
+import argparse, json, math, random, time
+
+STARTFEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+#cache ceiling of each engine, a game holds two
+TABLEBYTES = 128*1024*1024
+
+#-----------------------------------------------------------------------------
+# Move text #
+
+def moveText(action):
+    """Writes an action in coordinate notation, castles are written as the king's move
+    Args:
+    action -Action object
+    Returns: str -like e2e4"""
+    if action.piece != None:
+        r,f = toCoords(action.piece)
+        tr,tf = action.dest
+    else:
+        (king,kpos),rook = action.dest
+        r,f = toCoords(king)
+        tr,tf = kpos
+    return chr(ord('a')+f) + str(r+1) + chr(ord('a')+tf) + str(tr+1)
+
+def findMove(state,text):
+    """Finds the legal action written in coordinate notation
+    Args:
+    state -State to find the action in
+    text -str like e2e4
+    Returns: Action or None"""
+    for each in state.getMoves(state.turn):
+        if moveText(each) == text:
+            return each
+    return None
+
+#-----------------------------------------------------------------------------
+# Engines #
+
+class Engine:
+    """A search configuration that picks moves on its own clock"""
+    def __init__(self,spec,inc=None):
+        """Constructor
+        Args:
+        spec -str SEARCH or SEARCH:MAXDEPTH with a search name from analyze.SEARCHES
+        inc -float seconds added after every move, None to infer it from the clock"""
+        parts = spec.split(':')
+        self.spec = spec
+        self.search = parts[0]
+        self.maxdepth = 100
+        if len(parts) > 1:
+            self.maxdepth = int(parts[1])
+        if not self.search in SEARCHES:
+            raise ValueError("unknown search " + self.search)
+        self.table = HistoryTable()
+        #own caches so one engine's best moves and evals never steer the other's search
+        self.cache = TransTable(TABLEBYTES)
+        self.timer = TimeManager(inc)
+        self.extensions = Extensions()
+
+    def choose(self,state,clock,ply):
+        """Runs iterative deepening within a share of the clock
+        Args:
+        state -State to move from
+        clock -float seconds left on this side's clock
+        ply -int plies played so far
+        Returns: tuple(Action,float,int) -move, score and depth reached"""
+        State.table = self.cache
+        state.clearRepetition()
+        self.timer.startTurn(clock,ply,len(state.getMoves(state.turn)))
+        self.table.age()
+        #like AI.run a depth 1 search without the deadline makes sure there is a move to play, it's cheap
+        nodes = State.nodes
+        value,action = abMinimax(state,state.turn,1,-INFINITY,INFINITY)
+        best = (action,value,0)
+        self.timer.iteration(action,State.nodes-nodes,self.timer.elapsed())
+        for depth in range(1,self.maxdepth+1):
+            #a proven mate won't change with more depth
+            if abs(value) >= MATEBOUND or not self.timer.keepSearching():
+                break
+            nodes = State.nodes
+            itertime = self.timer.elapsed()
+            State.deadline = self.timer.deadline()
+            gap = None
+            try:
+                value,pv = SEARCHES[self.search](state,depth,1,self.table)[0]
+                best = (pv[0],value,depth)
+                #same obvious move check as AI.run
+                if depth >= 3 and abs(value) < MATEBOUND:
+                    gap = rootGap(state,(depth-1)*PLY,pv[0],value,EASYGAP,self.table,self.extensions)
+            except SearchTimeout:
+                break
+            finally:
+                State.deadline = None
+            self.timer.iteration(pv[0],State.nodes-nodes,self.timer.elapsed()-itertime,gap)
+            self.table.age()
+        self.timer.endTurn()
+        return best
+
+#-----------------------------------------------------------------------------
+# Games #
+
+def playGame(job):
+    """Plays one game between two engines
+    Args:
+    job -tuple(int,str,str,str,float,float,int,int) game number, white spec, black spec,
+    starting FEN, seconds per side, increment per move, max plies and eval noise seed
+    Returns: dict -compact game record"""
+    number,whitespec,blackspec,fen,clock,inc,maxplies,seed = job
+    setNoiseSeed(seed)
+    engines = [Engine(whitespec,inc),Engine(blackspec,inc)]
+    clocks = [clock,clock]
+    depths = [[],[]]
+    state = State()
+    state.generateFromFEN(fen)
+    moves = []
+    seen = {state.hash:1}
+    result,reason = None,None
+    while result == None:
+        actions = state.getMoves(state.turn)
+        if len(actions) == 0:
+            if state.isInCheck(state.turn):
+                result,reason = ["0-1","1-0"][state.turn],"checkmate"
+            else:
+                result,reason = "1/2-1/2","stalemate"
+        elif state.stale <= 0:
+            result,reason = "1/2-1/2","100 moves"
+        elif state.insufficientMaterial():
+            result,reason = "1/2-1/2","material"
+        elif seen[state.hash] >= 3:
+            result,reason = "1/2-1/2","repetition"
+        elif len(moves) >= maxplies:
+            result,reason = "1/2-1/2","max plies"
+        if result != None:
+            break
+        side = state.turn
+        starttime = time.time()
+        action,value,depth = engines[side].choose(state,clocks[side],len(moves))
+        clocks[side] -= time.time()-starttime
+        if clocks[side] <= 0:
+            result,reason = ["0-1","1-0"][side],"time"
+            break
+        clocks[side] += inc
+        depths[side].append(depth)
+        moves.append(moveText(action))
+        state = state.move(action)
+        seen[state.hash] = seen.get(state.hash,0) + 1
+    return {'game':number,'white':whitespec,'black':blackspec,'start':fen,'seed':seed,'result':result,'reason':reason,
+            'plies':len(moves),'moves':" ".join(moves),'clocks':[round(c,2) for c in clocks],
+            'depth':[round(float(sum(d))/max(1,len(d)),2) for d in depths]}
+
+def openings(fens,count,plies,seed):
+    """Makes starting positions by playing random moves from the given FENs
+    Args:
+    fens -list of str starting FENs
+    count -int number of openings
+    plies -int random plies played from each FEN
+    seed -int seed so runs can be repeated
+    Returns: list of str FENs"""
+    rand = random.Random(seed)
+    result = []
+    while len(result) < count:
+        state = State()
+        state.generateFromFEN(fens[len(result)%len(fens)])
+        for i in range(plies):
+            actions = state.getMovesManual(state.turn)
+            if len(actions) == 0:
+                break
+            state = state.move(rand.choice(actions))
+        if len(state.getMovesManual(state.turn)) > 0:
+            result.append(state.toFEN())
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Play engine configurations against each other")
+    parser.add_argument("--a",default="qui",help="first engine as SEARCH or SEARCH:MAXDEPTH (default qui)")
+    parser.add_argument("--b",default="order",help="second engine (default order)")
+    parser.add_argument("--games",type=int,default=2,help="number of games, each opening is played with both colors")
+    parser.add_argument("--processes",type=int,default=None,help="worker processes (default one per cpu)")
+    parser.add_argument("--clock",type=float,default=60.0,help="seconds per side")
+    parser.add_argument("--inc",type=float,default=0.0,help="seconds added after every move")
+    parser.add_argument("--maxplies",type=int,default=400,help="plies before a game is called a draw")
+    parser.add_argument("--openings",help="file of starting FENs, one per line")
+    parser.add_argument("--random-plies",type=int,default=4,help="random plies played from each opening")
+    parser.add_argument("--seed",type=int,default=0,help="seed for the random openings and eval noise")
+    parser.add_argument("--out",default="selfplay.jsonl",help="file the game records are appended to")
+    args = parser.parse_args()
+
+    fens = [STARTFEN]
+    if args.openings != None:
+        fens = [line.strip() for line in open(args.openings) if line.strip() != "" and not line.startswith("#")]
+    starts = openings(fens,(args.games+1)//2,args.random_plies,args.seed)
+    jobs = []
+    for i in range(args.games):
+        #every game gets its own noise but a run can be repeated
+        seed = args.seed*100003+i
+        if i%2 == 0:
+            jobs.append((i,args.a,args.b,starts[i//2],args.clock,args.inc,args.maxplies,seed))
+        else:
+            jobs.append((i,args.b,args.a,starts[i//2],args.clock,args.inc,args.maxplies,seed))
+
+    #score of engine a as wins,draws,losses
+    score = [0,0,0]
+    out = open(args.out,"a")
+    pool = Pool(args.processes)
+    for record in pool.imap_unordered(playGame,jobs):
+        out.write(json.dumps(record,sort_keys=True) + "\n")
+        out.flush()
+        if record['result'] == "1/2-1/2":
+            score[1] += 1
+        elif (record['result'] == "1-0") == (record['white'] == args.a):
+            score[0] += 1
+        else:
+            score[2] += 1
+        print "game %d: %s vs %s %s (%s, %d plies)" % (record['game'],record['white'],record['black'],record['result'],record['reason'],record['plies'])
+    pool.close()
+    out.close()
+
+    games = sum(score)
+    points = (score[0]+0.5*score[1])/games
+    print "%s vs %s: +%d =%d -%d, %.1f%%" % (args.a,args.b,score[0],score[1],score[2],100*points)
+    if 0 < points < 1:
+        print "Elo difference: %.0f" % (-400*math.log10(1/points-1))
+
+if __name__ == '__main__':
+    main()
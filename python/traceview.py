@@ -0,0 +1,156 @@
+#!/bin/env python
+##################################
+# traceview.py
+# Prints a search trace written by Tracer.dump as a tree
+# Usage: python traceview.py trace.txt [--maxply 2] [--hash H] [--last]
+##################################
+
+from EvalHeuristics import scoreString
+import argparse
+
+class Node:
+    """A searched state rebuilt from its enter and exit records"""
+    def __init__(self,fields):
+        """Constructor
+        Args:
+        fields -list of str from an enter line"""
+        self.ply = int(fields[1])
+        #the qui search passes its capture limit as a float
+        self.depth = int(float(fields[2]))
+        self.alpha = None
+        self.beta = None
+        if fields[3] != "None":
+            self.alpha = int(fields[3])
+            self.beta = int(fields[4])
+        self.maximizing = fields[5] == "True"
+        self.hash = int(fields[6])
+        self.search = fields[7]
+        #move played into this state
+        self.last = fields[8]
+        #capture limit of the quiescence search this node handed off to at its depth limit, None if it didn't
+        self.quiescence = None
+        self.value = None
+        self.move = None
+        self.aborted = False
+        self.children = []
+
+    def cutoff(self):
+        """Returns: bool -if the node failed high on its side's turn and stopped early"""
+        if self.value == None or self.alpha == None:
+            return False
+        if self.maximizing:
+            return self.value >= self.beta
+        return self.value <= self.alpha
+
+    def size(self):
+        """Returns: int -nodes in this subtree"""
+        return 1 + sum([child.size() for child in self.children])
+
+    def toStr(self):
+        """Returns: str -one line describing the node"""
+        if self.search == "quiesce":
+            string = "%s: %s qs%d" % (self.last,["min","max"][self.maximizing],self.depth)
+        else:
+            string = "%s: %s d%d" % (self.last,["min","max"][self.maximizing],self.depth)
+            if self.quiescence != None:
+                string += " +qs%d" % self.quiescence
+        if self.alpha != None:
+            string += " [%d,%d]" % (self.alpha,self.beta)
+        if self.aborted:
+            string += " abandoned"
+        elif self.value != None:
+            string += " %d (%s) best %s" % (self.value,scoreString(self.value),self.move)
+            if self.cutoff():
+                string += " cutoff"
+        else:
+            string += " unfinished"
+        return string + " (%d nodes) %x" % (self.size(),self.hash)
+
+def readTrace(path):
+    """Rebuilds the trees in a trace
+    The oldest records may have been overwritten so nodes whose start was lost are dropped
+    Args:
+    path -file written by Tracer.dump
+    Returns: list -of top level Node objects"""
+    roots = []
+    stack = []
+    for line in open(path):
+        if line.startswith("#") or line.strip() == "":
+            continue
+        fields = line.rstrip("\n").split("\t")
+        ply = int(fields[1])
+        while len(stack) > 0 and stack[-1].ply >= ply:
+            stack.pop()
+        if fields[0] == '>':
+            node = Node(fields)
+            if len(stack) > 0 and stack[-1].ply == ply-1:
+                stack[-1].children.append(node)
+            else:
+                roots.append(node)
+            stack.append(node)
+        else:
+            #an exit belongs to the open node at its ply, popped above so look at what was just closed
+            node = None
+            if len(stack) > 0 and stack[-1].ply == ply-1 and len(stack[-1].children) > 0:
+                node = stack[-1].children[-1]
+            elif len(stack) == 0 and len(roots) > 0:
+                node = roots[-1]
+            if node == None or node.ply != ply or node.value != None or node.aborted:
+                continue
+            if fields[0] == '!':
+                node.aborted = True
+            else:
+                node.value = int(fields[2])
+                node.move = fields[3]
+    for root in roots:
+        fold(root)
+    return roots
+
+def fold(node):
+    """Merges the quiescence search a node hands its own state to at the depth limit into the node,
+    so the captures searched from it show as its children instead of an extra ply"""
+    if len(node.children) == 1 and node.search != "quiesce":
+        child = node.children[0]
+        if child.search == "quiesce" and child.hash == node.hash and child.last == node.last:
+            node.quiescence = child.depth
+            node.children = child.children
+            if node.value == None and not node.aborted:
+                node.value = child.value
+                node.move = child.move
+                node.aborted = child.aborted
+    for child in node.children:
+        fold(child)
+
+def show(node,levels,indent=""):
+    """Prints a node and its children the given number of levels down"""
+    print indent + node.toStr()
+    if levels > 0:
+        for child in node.children:
+            show(child,levels-1,indent + "  ")
+
+def find(nodes,key):
+    """Returns: list -every node in the trees with the hash"""
+    found = []
+    for node in nodes:
+        if node.hash == key:
+            found.append(node)
+        found.extend(find(node.children,key))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a search trace as a tree")
+    parser.add_argument("trace",help="file written by Tracer.dump")
+    parser.add_argument("--maxply",type=int,default=1,help="levels shown below each tree, quiescence is folded into the node it starts from (default 1)")
+    parser.add_argument("--hash",help="only show the subtrees of the state with this hex hash")
+    parser.add_argument("--last",action="store_true",help="only show the last tree, the search running when the trace was written")
+    args = parser.parse_args()
+    roots = readTrace(args.trace)
+    if args.hash != None:
+        roots = find(roots,int(args.hash,16))
+    if args.last and len(roots) > 0:
+        roots = roots[-1:]
+    for root in roots:
+        show(root,args.maxply)
+
+if __name__ == '__main__':
+    main()
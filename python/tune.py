@@ -0,0 +1,267 @@
+#!/bin/env python
+##################################
+# tune.py
+# Fits the composite eval weights to the results of self-play games
+# Usage: python tune.py selfplay.jsonl [more.jsonl ...] [--out weights.json] [--processes 4]
+# Needs numpy, the engine itself doesn't
+##################################
+
+from Utils import *
+from selfplay import findMove
+from multiprocessing import Pool
+import EvalHeuristics
+import argparse, json, time
+import numpy as np
+
+#outcome of a game for white
+RESULTS = {"1-0":1.0,"1/2-1/2":0.5,"0-1":0.0}
+
+#terms fit by tune, the noise weight is held fixed
+TERMS = ['materialAdvantage','materialPercentage','pawnPercentage','pawnStructure','checkThreat','coverage','mobility']
+
+#piece codes in the packed boards are owner*8+kind+1 with 0 for an empty square
+PAWN,KNIGHT,BISHOP,ROOK,QUEEN,KING = [KINDS[ord(c)]+1 for c in "PNBRQK"]
+VALUES = np.zeros(16)
+VALUES[[PAWN,KNIGHT,BISHOP,ROOK,QUEEN]] = [1.0,3.0,3.0,5.0,9.0]
+
+#-----------------------------------------------------------------------------
+# Position extraction #
+
+def packBoard(state):
+    """Returns: str -64 bytes with the piece code of every square, rank*8+file"""
+    codes = []
+    for p in state.board:
+        if p == None:
+            codes.append(0)
+        else:
+            codes.append(p.getOwner()*8 + KINDS[p.getType()] + 1)
+    return "".join([chr(c) for c in codes])
+
+def replayGame(args):
+    """Replays one game record and packs its quiet positions
+    A position is quiet in the same sense as the quiescence search, the move into it wasn't a capture or promotion
+    Args:
+    args -tuple(dict,int) game record from selfplay.py and plies skipped at the start
+    Returns: tuple(list,float) -packed boards and the result for white"""
+    record,skip = args
+    State.table.reset()
+    state = State()
+    state.generateFromFEN(record['start'])
+    boards = []
+    moves = record['moves'].split()
+    for ply in range(len(moves)):
+        if ply >= skip and state.quiet:
+            boards.append(packBoard(state))
+        action = findMove(state,moves[ply])
+        if action == None:
+            #record doesn't match the engine, keep what was reached
+            break
+        state = state.move(action)
+    return (boards,RESULTS[record['result']])
+
+def loadGames(paths,skip,processes):
+    """Reads self-play records and extracts their quiet positions
+    Games called a draw for running too long are left out, their result says nothing about the positions
+    Args:
+    paths -list of JSON lines files written by selfplay.py
+    skip -int opening plies left out of every game
+    processes -int worker processes, None for one per cpu
+    Returns: tuple(numpy array,numpy array) -boards as Nx64 codes and the result for white of each"""
+    jobs = []
+    for path in paths:
+        for line in open(path):
+            if line.strip() == "":
+                continue
+            record = json.loads(line)
+            if record['result'] in RESULTS and record['reason'] != "max plies":
+                jobs.append((record,skip))
+    boards = []
+    results = []
+    pool = Pool(processes)
+    for packed,result in pool.imap_unordered(replayGame,jobs,8):
+        boards.extend(packed)
+        results.extend([result]*len(packed))
+    pool.close()
+    if len(boards) == 0:
+        return (np.zeros((0,64),dtype=np.uint8),np.zeros(0))
+    boards = np.frombuffer("".join(boards),dtype=np.uint8).reshape(-1,64)
+    return (boards,np.array(results))
+
+#-----------------------------------------------------------------------------
+# Vectorized heuristics #
+
+def shift(planes,dr,df):
+    """Moves every square of a stack of 8x8 planes by dr ranks and df files, squares moved off the board are lost
+    Args:
+    planes -Nx8x8 numpy array
+    dr -int ranks to move
+    df -int files to move
+    Returns: Nx8x8 numpy array"""
+    result = np.zeros_like(planes)
+    result[:,max(dr,0):8+min(dr,0),max(df,0):8+min(df,0)] = planes[:,max(-dr,0):8+min(-dr,0),max(-df,0):8+min(-df,0)]
+    return result
+
+def attacks(planes,player):
+    """Finds every square a side attacks
+    Args:
+    planes -Nx8x8 numpy array of piece codes
+    player -Side attacking
+    Returns: Nx8x8 bool numpy array"""
+    base = player*8
+    empty = planes == 0
+    direction = [1,-1][player]
+    pawns = planes == base+PAWN
+    result = shift(pawns,direction,1) | shift(pawns,direction,-1)
+    knights = planes == base+KNIGHT
+    for dr,df in KNIGHTSTEPS:
+        result |= shift(knights,dr,df)
+    kings = planes == base+KING
+    for dr,df in KINGSTEPS:
+        result |= shift(kings,dr,df)
+    queens = planes == base+QUEEN
+    for steps,sliders in [(DIAGONALS,queens | (planes == base+BISHOP)),(LINES,queens | (planes == base+ROOK))]:
+        for dr,df in steps:
+            #flood along the ray through empty squares, the first occupied square is attacked too
+            flood = sliders
+            for i in range(6):
+                flood = flood | (shift(flood,dr,df) & empty)
+            result |= shift(flood,dr,df)
+    return result
+
+def mobility(planes,player):
+    """Counts the moves of a side's pieces other than pawns, ignoring checks and pins like State.getMobility
+    Args:
+    planes -Nx8x8 numpy array of piece codes
+    player -Side moving
+    Returns: N numpy array"""
+    base = player*8
+    empty = planes == 0
+    free = empty | ((planes >> 3) != player)
+    count = np.zeros(len(planes))
+    for steps,kind in [(KNIGHTSTEPS,KNIGHT),(KINGSTEPS,KING)]:
+        pieces = planes == base+kind
+        for dr,df in steps:
+            count += (shift(pieces,dr,df) & free).sum(axis=(1,2))
+    queens = planes == base+QUEEN
+    for steps,sliders in [(DIAGONALS,queens | (planes == base+BISHOP)),(LINES,queens | (planes == base+ROOK))]:
+        for dr,df in steps:
+            #sliders still travelling along the ray, counted separately since one can stand behind another
+            reach = sliders.astype(np.int32)
+            for i in range(7):
+                reach = shift(reach,dr,df)
+                count += (reach*free).sum(axis=(1,2))
+                reach = reach*empty
+    return count
+
+def terms(boards):
+    """Computes every fitted composite term for white, matching EvalHeuristics
+    Args:
+    boards -Nx64 numpy array of piece codes
+    Returns: NxT numpy array with columns in TERMS order"""
+    values = VALUES[boards & 7]
+    white = (values*(boards < 8)).sum(1)
+    black = (values*(boards >= 8)).sum(1)
+    total = np.maximum(white+black,1e-9)
+    columns = [(white-black+39.0)/78.0, white/total]
+
+    planes = boards.reshape(-1,8,8)
+    #like pawnScore a pawn of either color counts as a neighbor
+    pawns = ((planes & 7) == PAWN).astype(np.float64)
+    whitepawns = planes == PAWN
+    blackpawns = planes == 8+PAWN
+    side = shift(pawns,0,1) + shift(pawns,0,-1)
+    pawnwhite = (whitepawns*(side + 2*(shift(pawns,1,1)+shift(pawns,1,-1)))).sum(axis=(1,2))
+    pawnblack = (blackpawns*(side + 2*(shift(pawns,-1,1)+shift(pawns,-1,-1)))).sum(axis=(1,2))
+    pawntotal = pawnwhite+pawnblack
+    columns.append(np.where(pawntotal == 0,0.5,pawnwhite/np.maximum(pawntotal,1)))
+    columns.append((pawnwhite-pawnblack+14.0)/28.0)
+
+    whiteattacks = attacks(planes,0)
+    blackattacks = attacks(planes,1)
+    whitecheck = (blackattacks & (planes == KING)).any(axis=(1,2))
+    blackcheck = (whiteattacks & (planes == 8+KING)).any(axis=(1,2))
+    columns.append(0.5 + 0.5*(blackcheck.astype(np.float64) - whitecheck))
+
+    for white,black in [(whiteattacks.sum(axis=(1,2)),blackattacks.sum(axis=(1,2))),(mobility(planes,0),mobility(planes,1))]:
+        total = white+black
+        columns.append(np.where(total == 0,0.5,white/np.maximum(total,1.0)))
+    return np.column_stack(columns)
+
+#-----------------------------------------------------------------------------
+# Fitting #
+
+def projectSimplex(w,total):
+    """Returns: the closest point to w with no negative entries summing to total"""
+    u = np.sort(w)[::-1]
+    cumulative = np.cumsum(u) - total
+    index = np.arange(1,len(w)+1)
+    rho = index[u - cumulative/index > 0][-1]
+    return np.maximum(w - cumulative[rho-1]/rho,0)
+
+def fit(x,y,noise,iterations=20000):
+    """Finds the weights minimizing the squared error between composite and the game results
+    The weights stay non negative and sum to 1 with the noise weight so composite keeps its 0-1 scale and symmetry
+    Args:
+    x -NxT numpy array of terms for white
+    y -N numpy array of results for white
+    noise -float weight held by randomify, its mean of 0.5 is taken as its value
+    iterations -int projected gradient steps
+    Returns: T numpy array of weights"""
+    target = y - 0.5*noise
+    xtx = x.T.dot(x)/len(y)
+    xty = x.T.dot(target)/len(y)
+    step = 1.0/np.linalg.eigvalsh(xtx).max()
+    w = np.ones(x.shape[1])*(1.0-noise)/x.shape[1]
+    for i in range(iterations):
+        w = projectSimplex(w - step*(xtx.dot(w) - xty),1.0-noise)
+    return w
+
+def error(x,y,w,noise):
+    """Returns: float -mean squared error of composite with weights w"""
+    return ((x.dot(w) + 0.5*noise - y)**2).mean()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the composite eval weights to self-play results")
+    parser.add_argument("games",nargs="+",help="game records written by selfplay.py")
+    parser.add_argument("--out",default=EvalHeuristics.WEIGHTSFILE,help="weights file to write (default the one composite loads)")
+    parser.add_argument("--skip",type=int,default=8,help="opening plies left out of every game")
+    parser.add_argument("--processes",type=int,default=None,help="worker processes for replaying games (default one per cpu)")
+    parser.add_argument("--holdout",type=float,default=0.1,help="share of positions kept out of the fit to check it")
+    parser.add_argument("--seed",type=int,default=0,help="seed for picking the held out positions")
+    args = parser.parse_args()
+
+    starttime = time.time()
+    boards,results = loadGames(args.games,args.skip,args.processes)
+    if len(results) == 0:
+        parser.error("no quiet positions in the game records")
+    print "%d positions extracted in %.1fs" % (len(results),time.time()-starttime)
+
+    starttime = time.time()
+    x = terms(boards)
+    print "terms computed in %.1fs" % (time.time()-starttime)
+
+    test = np.random.RandomState(args.seed).rand(len(results)) < args.holdout
+    if test.all() or not test.any():
+        test = np.zeros(len(results),dtype=bool)
+    train = ~test
+    noise = EvalHeuristics.WEIGHTS['randomify']
+    old = np.array([EvalHeuristics.WEIGHTS[name] for name in TERMS])
+    new = fit(x[train],results[train],noise)
+
+    print "%-20s %8s %8s" % ("term","old","new")
+    for i in range(len(TERMS)):
+        print "%-20s %8.4f %8.4f" % (TERMS[i],old[i],new[i])
+    print "%-20s %8.4f %8.4f" % ("randomify",noise,noise)
+    print "train error: %.5f -> %.5f" % (error(x[train],results[train],old,noise),error(x[train],results[train],new,noise))
+    if test.any():
+        print "held out error: %.5f -> %.5f" % (error(x[test],results[test],old,noise),error(x[test],results[test],new,noise))
+
+    weights = dict(zip(TERMS,[round(float(w),6) for w in new]))
+    weights['randomify'] = noise
+    out = open(args.out,"w")
+    out.write(json.dumps(weights,indent=2,sort_keys=True) + "\n")
+    out.close()
+    print "weights written to", args.out
+
+if __name__ == '__main__':
+    main()